@@ -4,8 +4,9 @@ import os
 from google import genai
 import pandas as pd
 
-from src.services.market_data import get_stock_candles, get_crypto_price
-from src.services.indicators import add_indicators
+from src.services.market_data import get_stock_candle_arrays
+from src.services.indicators import latest_indicators
+from src.services.symbol_resolver import resolve_symbol
 
 try:
     from src.services.risk_score import calculate_risk
@@ -36,6 +37,13 @@ def _calc_risk(volatility):
     }
 
 
+def _num(value):
+    """Plain float for JSON output (None for missing / NaN)."""
+    if value is None or pd.isna(value):
+        return None
+    return float(value)
+
+
 # ---------------------------------------------
 # Strategy Engine
 # ---------------------------------------------
@@ -59,35 +67,39 @@ class StrategyEngine:
         symbol = symbol.upper()
 
         # --------------------------------------------------------
-        # 1) Load 6 months candles
+        # 1) Resolve equity vs crypto, then load 6 months candles
         # --------------------------------------------------------
-        candles = get_stock_candles(symbol, period="6mo")
+        resolved = resolve_symbol(symbol)
 
-        if isinstance(candles, dict) and candles.get("error"):
-            # fallback to crypto
-            candles = get_crypto_price(symbol)
+        if resolved["asset_class"] == "unknown":
+            return {
+                "status": "error",
+                "message": f"Unknown symbol {symbol}",
+                "raw": resolved
+            }
+
+        candles = get_stock_candle_arrays(resolved["ticker"], period="6mo")
 
-        if not isinstance(candles, pd.DataFrame):
+        if not len(candles):
             return {
                 "status": "error",
                 "message": "Could not load market data",
-                "raw": candles
+                "raw": resolved
             }
 
         # --------------------------------------------------------
-        # 2) Add indicators into the DataFrame
+        # 2) Latest indicator values (tail only)
         # --------------------------------------------------------
-        candles = add_indicators(
+        last = latest_indicators(
+            resolved["ticker"],
             candles,
-            indicators=["rsi", "macd", "sma20", "ema20", "volatility"]
+            indicators=["rsi", "macd", "volatility"]
         )
 
-        last = candles.iloc[-1]
-
-        price = float(last.get("close"))
-        rsi = last.get("rsi")
-        macd = last.get("macd")
-        volatility = last.get("volatility")
+        price = float(candles.close[-1])
+        rsi = _num(last.get("RSI"))
+        macd = _num(last.get("MACD"))
+        volatility = _num(last.get("VOLATILITY"))
 
         # --------------------------------------------------------
         # 3) Risk score
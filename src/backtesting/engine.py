@@ -0,0 +1,189 @@
+# src/backtesting/engine.py
+"""
+The backtest engine. Every backtest in the app runs through it:
+services.backtest.backtest(), backtesting.backtest.run_ma_backtest(), the
+parameter grid / walk-forward, the portfolio sleeves and (chunk by chunk,
+with the same strategies and Account) the streaming engine.
+
+One set of semantics:
+- ma_crossover is long while SMA(short) > SMA(long) (full-window means);
+  rsi enters below `oversold` and exits above `overbought`.
+- Trades fill all-in / all-out at the close of the signal bar.
+- An open position is valued at the last close; its round trip is
+  reported with "open": True.
+- Defaults: ma_crossover 50/200, RSI(14), 10,000 starting cash.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.backtesting.metrics import TRADING_DAYS, performance
+from src.backtesting.simulator import positions, simulate, state_events, threshold_events
+from src.services.indicator_panel import panel_rsi, panel_sma
+
+INITIAL_CASH = 10000
+DEFAULT_STRATEGY: Dict[str, Any] = {"type": "ma_crossover", "params": {"short": 50, "long": 200}}
+STRATEGY_TYPES = ("ma_crossover", "rsi")
+
+
+# -------------------------------------------------------
+# Signals
+# -------------------------------------------------------
+
+def signal_events(stype, params, close, sma=None, rsi=None):
+    """
+    Entry/exit events for a strategy type on a close array
+    (1-D, or a (bars, symbols) panel with panel sma / rsi arrays).
+
+    sma: window -> rolling-mean array (computed here when missing)
+    rsi: RSI array (computed here when missing)
+    Unknown types never trade.
+    """
+    close = np.asarray(close, dtype=np.float64)
+
+    # MA CROSSOVER: long while SMA_short > SMA_long
+    if stype == "ma_crossover":
+        short = params["short"]
+        long = params["long"]
+
+        if sma is None:
+            sma = {w: panel_sma(close, w, min_periods=w) for w in {short, long}}
+        return state_events(sma[short] > sma[long])
+
+    # RSI REVERSAL: enter below oversold, exit above overbought
+    if stype == "rsi":
+        if rsi is None:
+            rsi = panel_rsi(close, int(params.get("period", 14)))
+        return threshold_events(rsi, params["oversold"], params["overbought"])
+
+    return np.zeros(close.shape, dtype=np.int8)
+
+
+def point_events(stype, points, close, sma=None, rsi=None):
+    """
+    (bars, points) events: one column per parameter set of the same type,
+    e.g. a whole grid at once. sma: window -> rolling-mean array;
+    rsi: period -> RSI array (each computed here when missing).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if stype == "ma_crossover":
+        windows = {p["short"] for p in points} | {p["long"] for p in points}
+        if sma is None:
+            sma = {w: panel_sma(close, w, min_periods=w) for w in windows}
+        # built as (points, bars) rows and transposed: each column stays contiguous
+        fast = np.stack([sma[p["short"]] for p in points]).T
+        slow = np.stack([sma[p["long"]] for p in points]).T
+        return state_events(fast > slow)
+
+    if stype == "rsi":
+        periods = [int(p.get("period", 14)) for p in points]
+        if rsi is None:
+            rsi = {n: panel_rsi(close, n) for n in set(periods)}
+        if len(set(periods)) == 1:
+            values = np.broadcast_to(np.asarray(rsi[periods[0]], dtype=np.float64)[:, None],
+                                     (len(close), len(points)))
+        else:
+            values = np.stack([rsi[n] for n in periods]).T
+        low = np.array([p["oversold"] for p in points], dtype=np.float64)
+        high = np.array([p["overbought"] for p in points], dtype=np.float64)
+        return threshold_events(values, low, high)
+
+    return np.zeros((len(close), len(points)), dtype=np.int8)
+
+
+# -------------------------------------------------------
+# Results
+# -------------------------------------------------------
+
+def summarize(sim: Dict[str, Any], initial_cash: float = INITIAL_CASH) -> Dict[str, Any]:
+    """Balance, return, trade count and max drawdown of one simulate() run."""
+    equity = sim["equity"]
+    balance = sim["final_balance"]
+    drawdown = 0.0
+    if len(equity):
+        peak = np.maximum.accumulate(equity)
+        drawdown = float((equity / peak - 1.0).min()) * 100
+    return {
+        "final_balance": round(balance, 2),
+        "profit": round(balance - initial_cash, 2),
+        "return_pct": round((balance / initial_cash - 1.0) * 100, 4),
+        "trades": int(len(sim["entries"]) + len(sim["exits"])),
+        "max_drawdown_pct": round(drawdown, 4),
+    }
+
+
+def round_trips(close: np.ndarray, sim: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Entry → exit pairs with cash P&L; a still-open position is marked at the last close."""
+    entries = sim["entries"]
+    exits = np.concatenate([sim["exits"], np.full(len(entries) - len(sim["exits"]), len(close) - 1)])
+    exits = exits.astype(np.int64)
+    entry_px, exit_px = close[entries], close[exits]
+    pnl = sim["shares"] * (exit_px - entry_px)
+    ret = (exit_px / entry_px - 1.0) * 100
+    closed = len(sim["exits"])
+    return [
+        {
+            "entry_bar": int(entries[k]),
+            "exit_bar": int(exits[k]),
+            "entry_price": float(entry_px[k]),
+            "exit_price": float(exit_px[k]),
+            "pnl": round(float(pnl[k]), 2),
+            "return_pct": round(float(ret[k]), 4),
+            "open": k >= closed,
+        }
+        for k in range(len(entries))
+    ]
+
+
+# -------------------------------------------------------
+# Engine
+# -------------------------------------------------------
+
+def run_backtest(
+    close: np.ndarray,
+    strategy: Optional[Dict[str, Any]] = None,
+    initial_cash: float = INITIAL_CASH,
+    sma: Optional[Dict[int, np.ndarray]] = None,
+    rsi: Optional[np.ndarray] = None,
+    periods: float = TRADING_DAYS,
+) -> Dict[str, Any]:
+    """
+    Backtest `strategy` on a close array.
+
+    sma / rsi: precomputed indicator arrays (e.g. memoized per symbol);
+    computed here when missing. periods: bars per year, to annualize the
+    metrics. Besides the summary, the result carries the round trips,
+    wins / losses, metrics.performance() and — as arrays, for further
+    analysis — the per-bar equity curve and position.
+    """
+    strategy = strategy or DEFAULT_STRATEGY
+    close = np.asarray(close, dtype=np.float64)
+    events = signal_events(strategy["type"], strategy.get("params", {}), close, sma=sma, rsi=rsi)
+    pos = positions(events)
+    sim = simulate(close, pos, initial_cash=initial_cash)
+
+    trips = round_trips(close, sim)
+    wins = sum(t["pnl"] > 0 for t in trips)
+    return {
+        "bars": len(close),
+        **summarize(sim, initial_cash),
+        "wins": wins,
+        "losses": len(trips) - wins,
+        "metrics": performance(sim["equity"], pos, initial_cash, periods),
+        "round_trips": trips,
+        "equity": sim["equity"],
+        "position": pos,
+    }
+
+
+__all__ = [
+    "INITIAL_CASH",
+    "DEFAULT_STRATEGY",
+    "STRATEGY_TYPES",
+    "signal_events",
+    "point_events",
+    "summarize",
+    "round_trips",
+    "run_backtest",
+]
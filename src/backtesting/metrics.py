@@ -0,0 +1,106 @@
+# src/backtesting/metrics.py
+"""
+Performance metrics of backtests, from the equity curve and position.
+
+performance() takes one curve (bars,) or a panel of many backtests
+(bars, k) — axis 0 is always time — and computes everything in one
+vectorized pass over the per-bar returns: total return, CAGR, volatility,
+Sharpe, Sortino, max drawdown, exposure, turnover, round trips and hit rate.
+A single curve gives rounded floats (None where undefined); a panel gives
+one float array per metric, so a parameter grid is scored at once.
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def periods_per_year(times: np.ndarray, default: float = TRADING_DAYS) -> float:
+    """Bars per year implied by int64 ns timestamps (daily → ~252, hourly → ~1,700)."""
+    if len(times) < 2:
+        return float(default)
+    years = (int(times[-1]) - int(times[0])) / (365.25 * 86400 * 10**9)
+    return (len(times) - 1) / years if years > 0 else float(default)
+
+
+def _carry_forward(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """values where mask, else the last masked value above (NaN before the first)."""
+    bars = np.arange(len(values)).reshape((-1,) + (1,) * (values.ndim - 1))
+    idx = np.maximum.accumulate(np.where(mask, bars, -1), axis=0)
+    out = np.take_along_axis(values, np.maximum(idx, 0), axis=0)
+    return np.where(idx >= 0, out, np.nan)
+
+
+def performance(
+    equity: np.ndarray,
+    position: Optional[np.ndarray] = None,
+    initial_cash: float = 10000.0,
+    periods: float = TRADING_DAYS,
+    risk_free: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Metrics of one equity curve (bars,) or a panel (bars, k).
+
+    position: the 0/1 position per bar (same shape), for exposure, trade
+    stats and turnover (position changes per year; each one trades the
+    whole account). periods: bars per year, used to annualize.
+    risk_free: annual rate for Sharpe / Sortino.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    single = equity.ndim == 1
+    if single:
+        equity = equity[:, None]
+        position = None if position is None else np.asarray(position)[:, None]
+    n, k = equity.shape
+    if not n:
+        return {}
+
+    # per-bar returns, the first one from the starting cash
+    prev = np.vstack([np.full((1, k), float(initial_cash)), equity[:-1]])
+    excess = equity / prev - 1.0 - risk_free / periods
+
+    total = equity[-1] / initial_cash
+    years = n / periods
+    mean = excess.mean(axis=0)
+    std = excess.std(axis=0, ddof=1) if n > 1 else np.full(k, np.nan)
+    downside = np.sqrt((np.minimum(excess, 0.0) ** 2).mean(axis=0))
+    peak = np.maximum.accumulate(np.maximum(equity, initial_cash), axis=0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out: Dict[str, np.ndarray] = {
+            "total_return_pct": (total - 1.0) * 100,
+            "cagr_pct": (np.power(total, 1.0 / years) - 1.0) * 100,
+            "volatility_pct": std * np.sqrt(periods) * 100,
+            "sharpe": np.where(std > 0, mean / std * np.sqrt(periods), np.nan),
+            "sortino": np.where(downside > 0, mean / downside * np.sqrt(periods), np.nan),
+            "max_drawdown_pct": (equity / peak - 1.0).min(axis=0) * 100,
+        }
+
+        if position is not None:
+            pos = np.asarray(position, dtype=np.int8)
+            change = np.diff(pos, axis=0, prepend=np.zeros((1, k), dtype=np.int8))
+            entries = change > 0
+            # a trade closes on its exit bar, or — still open — on the last bar
+            exits = change < 0
+            exits[-1] |= pos[-1] > 0
+            entry_equity = _carry_forward(equity, entries)
+            trips = exits.sum(axis=0)
+            wins = (exits & (equity > entry_equity)).sum(axis=0)
+            out.update({
+                "exposure_pct": pos.mean(axis=0) * 100,
+                "turnover": np.abs(change).sum(axis=0) / years,
+                "round_trips": trips.astype(np.float64),
+                "hit_rate_pct": np.where(trips > 0, wins / trips * 100, np.nan),
+            })
+
+    if not single:
+        return out
+    scalars = {name: (None if not np.isfinite(v[0]) else round(float(v[0]), 4)) for name, v in out.items()}
+    if "round_trips" in scalars:
+        scalars["round_trips"] = int(scalars["round_trips"])
+    return scalars
+
+
+__all__ = ["TRADING_DAYS", "periods_per_year", "performance"]
@@ -0,0 +1,172 @@
+# src/backtesting/monte_carlo.py
+"""
+Monte Carlo bootstrap of backtest results.
+
+One backtest is one path. Resampling its returns — per bar ("daily") or
+per round trip ("trades") — in contiguous blocks (circular block bootstrap,
+which keeps volatility clusters and streaks intact) gives thousands of
+alternative paths, and percentile bands for the final balance, return and
+max drawdown.
+
+Paths are built as one (paths × steps) matrix of log returns gathered
+block-wise → cumulative sums → running peaks, a batch of rows at a time so
+a long history does not need gigabytes. Nothing is looped per path.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.backtesting.engine import DEFAULT_STRATEGY, INITIAL_CASH, run_backtest
+from src.services.indicators import rsi_array
+from src.services.market_data import get_stock_candle_arrays
+
+DEFAULT_PATHS = 10_000
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+MAX_PATHS = 100_000
+
+# cells (paths × steps) per batch: ~8 MB per float64 matrix
+_BATCH_CELLS = 1_000_000
+
+
+def default_block(n: int) -> int:
+    """Block length ~ n^(1/3), the usual rule of thumb for the block bootstrap."""
+    return max(1, int(round(n ** (1 / 3))))
+
+
+def bootstrap(
+    returns: np.ndarray,
+    paths: int = DEFAULT_PATHS,
+    block: Optional[int] = None,
+    steps: Optional[int] = None,
+    initial_cash: float = INITIAL_CASH,
+    seed: Optional[int] = None,
+    progress: Optional[Callable] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Resample simple `returns` into `paths` paths of `steps` returns each
+    (default: as many as there are returns). progress: optional
+    callback(fraction, None) after each batch of paths.
+
+    Returns per-path arrays: "final_balance" and "max_drawdown_pct"
+    (≤ 0, from the start of the path, which counts as the first peak).
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    returns = returns[np.isfinite(returns)]
+    n = len(returns)
+    steps = int(steps or n)
+    if not n or not steps:
+        flat = np.full(paths, float(initial_cash))
+        return {"final_balance": flat, "max_drawdown_pct": np.zeros(paths)}
+
+    block = min(int(block or default_block(n)), n)
+    logret = np.log1p(np.maximum(returns, -1.0 + 1e-12))
+    # every circular block as a row of a strided view: gathering rows copies
+    # the returns straight into the path matrix, no index matrix needed
+    windows = sliding_window_view(np.concatenate([logret, logret[:block - 1]]), block)
+    blocks = -(-steps // block)
+    rng = np.random.default_rng(seed)
+
+    final = np.empty(paths)
+    drawdown = np.empty(paths)
+    batch = max(1, _BATCH_CELLS // steps)
+    for lo in range(0, paths, batch):
+        rows = min(paths, lo + batch) - lo
+        cum = windows[rng.integers(0, n, size=(rows, blocks))].reshape(rows, blocks * block)
+        cum = np.cumsum(cum[:, :steps], axis=1)
+        # drawdown in log space; the start of the path is the first peak
+        peak = np.maximum(cum, 0.0)
+        np.maximum.accumulate(peak, axis=1, out=peak)
+        np.subtract(cum, peak, out=peak)
+        final[lo:lo + rows] = cum[:, -1]
+        drawdown[lo:lo + rows] = peak.min(axis=1)
+        if progress is not None:
+            progress((lo + rows) / paths, None)
+
+    return {
+        "final_balance": initial_cash * np.exp(final),
+        "max_drawdown_pct": np.expm1(drawdown) * 100,
+    }
+
+
+def percentile_bands(values: np.ndarray, percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+                     digits: int = 2) -> Dict[str, float]:
+    """{"p5": ..., "p50": ..., ...} of `values`."""
+    bands = np.percentile(values, percentiles)
+    return {f"p{p:g}": round(float(v), digits) for p, v in zip(percentiles, bands)}
+
+
+def monte_carlo_backtest(
+    symbol: str = "AAPL",
+    strategy: Optional[Dict[str, Any]] = None,
+    period: str = "1y",
+    resample: str = "daily",
+    paths: int = DEFAULT_PATHS,
+    block: Optional[int] = None,
+    seed: Optional[int] = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    progress: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Backtest `strategy` once, then bootstrap its returns into `paths` paths.
+
+    resample: "daily" (per-bar strategy returns, flat bars included) or
+    "trades" (round-trip returns, the same number of trades per path).
+    seed: fix it for reproducible bands. progress: optional
+    callback(fraction, None) while paths are generated.
+    """
+    started = time.perf_counter()
+    if resample not in ("daily", "trades"):
+        return {"error": f"Unknown resample mode: {resample!r} (use 'daily' or 'trades')"}
+    paths = max(1, min(int(paths), MAX_PATHS))
+
+    candles = get_stock_candle_arrays(symbol, period=period)
+    if not len(candles):
+        return {"error": "No candle data"}
+
+    strategy = strategy or DEFAULT_STRATEGY
+    rsi = None
+    if strategy["type"] == "rsi":
+        rsi = rsi_array(symbol, candles, strategy.get("params", {}).get("period", 14))
+    result = run_backtest(candles.close, strategy, rsi=rsi)
+
+    if resample == "daily":
+        equity = np.concatenate([[INITIAL_CASH], result["equity"]])
+        returns = equity[1:] / equity[:-1] - 1.0
+    else:
+        returns = np.array([t["return_pct"] / 100 for t in result["round_trips"]])
+    if not len(returns):
+        return {"error": "The strategy did not trade; nothing to resample"}
+    block = min(int(block or default_block(len(returns))), len(returns))
+
+    sims = bootstrap(returns, paths=paths, block=block, seed=seed, progress=progress)
+    final = sims["final_balance"]
+
+    return {
+        "symbol": symbol.upper(),
+        "strategy": strategy,
+        "period": period,
+        "resample": resample,
+        "paths": paths,
+        "block": block,
+        "samples": len(returns),
+        "actual": {
+            "final_balance": result["final_balance"],
+            "max_drawdown_pct": result["max_drawdown_pct"],
+        },
+        "final_balance": percentile_bands(final, percentiles),
+        "return_pct": percentile_bands((final / INITIAL_CASH - 1.0) * 100, percentiles, 4),
+        "max_drawdown_pct": percentile_bands(sims["max_drawdown_pct"], percentiles, 4),
+        "prob_loss": round(float((final < INITIAL_CASH).mean()), 4),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+__all__ = [
+    "default_block",
+    "bootstrap",
+    "percentile_bands",
+    "monte_carlo_backtest",
+]
@@ -0,0 +1,157 @@
+# src/backtesting/simulator.py
+"""
+Vectorized long-only simulation core.
+
+signal events (+1 enter, -1 exit, 0 nothing) → position (0/1, the last event
+carried forward) → fills (where the position changes) → equity curve.
+Everything is NumPy over whole arrays; only the fills are walked in Python,
+so the cash / share arithmetic is exactly the one the old per-row loops did
+(all-in on entry, all-out on exit).
+
+The signal helpers also take (bars, symbols) panels — axis 0 is always
+time — so a whole basket gets its positions in one pass.
+"""
+
+from typing import Any, Dict
+
+import numpy as np
+
+
+# -------------------------------------------------------
+# Signals
+# -------------------------------------------------------
+
+def threshold_events(values: np.ndarray, low: float, high: float) -> np.ndarray:
+    """+1 where `values` < low, -1 where > high (e.g. RSI oversold / overbought)."""
+    values = np.asarray(values, dtype=np.float64)
+    events = np.zeros(values.shape, dtype=np.int8)
+    events[values > high] = -1
+    events[values < low] = 1
+    return events
+
+
+def state_events(state: np.ndarray) -> np.ndarray:
+    """Events from a 0/1 target state (its first difference; nothing on bar 0)."""
+    state = np.asarray(state, dtype=np.int8)
+    events = np.zeros(state.shape, dtype=np.int8)
+    events[1:] = np.diff(state, axis=0)
+    return events
+
+
+def positions(events: np.ndarray) -> np.ndarray:
+    """0/1 position: the last non-zero event carried forward, flat before the first."""
+    events = np.asarray(events)
+    bars = np.arange(len(events)).reshape((-1,) + (1,) * (events.ndim - 1))
+    idx = np.where(events != 0, bars, -1)
+    idx = np.maximum.accumulate(idx, axis=0) if len(idx) else idx
+    held = np.where(idx >= 0, np.take_along_axis(events, np.maximum(idx, 0), axis=0), 0)
+    return (held > 0).astype(np.int8)
+
+
+# -------------------------------------------------------
+# Simulation
+# -------------------------------------------------------
+
+class Account:
+    """
+    All-in / all-out long account that can be stepped chunk by chunk.
+
+    State (cash, shares, position, equity peak, worst drawdown, fills) carries
+    over between step() calls, so one long series fed in pieces ends exactly
+    where a single call on the whole series would.
+    """
+
+    __slots__ = ("initial_cash", "cash", "shares", "position", "last_close",
+                 "peak", "max_drawdown", "entries", "exits", "bars")
+
+    def __init__(self, initial_cash: float = 10000.0):
+        self.initial_cash = float(initial_cash)
+        self.cash = float(initial_cash)
+        self.shares = 0.0
+        self.position = 0
+        self.last_close = float("nan")
+        self.peak = float(initial_cash)
+        self.max_drawdown = 0.0
+        self.entries = 0
+        self.exits = 0
+        self.bars = 0
+
+    def step(self, close: np.ndarray, position: np.ndarray) -> Dict[str, Any]:
+        """
+        Trade `position` (0/1 per bar) at each bar's close.
+
+        Returns this chunk's fill indices (local), their sides (+1 buy,
+        -1 sell), shares held after each fill and the chunk's equity curve.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        position = np.asarray(position, dtype=np.int8)
+        n = len(close)
+
+        change = np.diff(position, prepend=np.int8(self.position))
+        fills = np.flatnonzero(change)
+        sides = change[fills]
+
+        # per-fill arithmetic in order (few iterations, exact like the old loops)
+        seg_cash = np.empty(len(fills) + 1)
+        seg_shares = np.empty(len(fills) + 1)
+        seg_cash[0], seg_shares[0] = self.cash, self.shares
+        for k, i in enumerate(fills):
+            if sides[k] > 0:
+                self.shares = self.cash / close[i]
+                self.cash = 0.0
+                self.entries += 1
+            else:
+                self.cash = self.shares * close[i]
+                self.shares = 0.0
+                self.exits += 1
+            seg_cash[k + 1], seg_shares[k + 1] = self.cash, self.shares
+
+        if n:
+            segment = np.searchsorted(fills, np.arange(n), side="right")
+            held = seg_shares[segment]
+            equity = np.where(held != 0.0, held * close, seg_cash[segment])
+            peak = np.maximum.accumulate(np.maximum(equity, self.peak))
+            self.max_drawdown = min(self.max_drawdown, float((equity / peak - 1.0).min()))
+            self.peak = float(peak[-1])
+            self.position = int(position[-1])
+            self.last_close = float(close[-1])
+        else:
+            equity = np.empty(0)
+        self.bars += n
+
+        return {"fills": fills, "sides": sides, "shares": seg_shares[1:], "equity": equity}
+
+    @property
+    def balance(self) -> float:
+        """Cash, or the open position valued at the last close."""
+        return float(self.shares * self.last_close if self.shares else self.cash)
+
+
+def simulate(close: np.ndarray, position: np.ndarray, initial_cash: float = 10000.0) -> Dict[str, Any]:
+    """
+    Trade `position` (0/1 per bar) at each bar's close, all-in / all-out.
+
+    Returns entry and exit bar indices, shares per trade, the per-bar
+    equity curve and the final balance (an open position is valued at the
+    last close).
+    """
+    account = Account(initial_cash)
+    out = account.step(close, position)
+    buys = out["sides"] > 0
+
+    return {
+        "entries": out["fills"][buys],
+        "exits": out["fills"][~buys],
+        "shares": out["shares"][buys],
+        "equity": out["equity"],
+        "final_balance": float(account.balance),
+    }
+
+
+__all__ = [
+    "threshold_events",
+    "state_events",
+    "positions",
+    "Account",
+    "simulate",
+]
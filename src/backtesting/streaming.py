@@ -0,0 +1,240 @@
+# src/backtesting/streaming.py
+"""
+Event-driven backtests over bar streams of any length, in constant memory.
+
+Bars arrive as Candles chunks — from a generator of bar tuples, or straight
+from the candle store's memory-mapped files — and each chunk goes
+strategy.on_chunk() → events → positions → Account.step(). Only a small
+tail of past closes (the strategy's look-back) and the account state carry
+over between chunks, so the result is the same however the series is cut.
+
+Strategies either react bar by bar (override on_bar) or vectorize a whole
+chunk with carried state (override on_chunk), as the built-ins do.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting.engine import DEFAULT_STRATEGY, INITIAL_CASH
+from src.backtesting.simulator import Account, positions, threshold_events
+from src.services.candles import Candles
+from src.services.indicator_panel import panel_rsi, panel_sma
+from src.services.market_data import candle_store, sync_candle_store
+
+DEFAULT_CHUNK_BARS = 100_000
+
+
+# -------------------------------------------------------
+# Strategies
+# -------------------------------------------------------
+
+class StreamingStrategy:
+    """
+    Base strategy. Return +1 to go long, -1 to go flat, 0 to do nothing.
+
+    The default on_chunk() calls on_bar() for every bar; override on_chunk()
+    to handle a whole chunk at once.
+    """
+
+    def on_bar(self, ts: int, open: float, high: float, low: float, close: float, volume: float) -> int:
+        return 0
+
+    def on_chunk(self, chunk: Candles) -> np.ndarray:
+        events = np.zeros(len(chunk), dtype=np.int8)
+        for i in range(len(chunk)):
+            events[i] = self.on_bar(int(chunk.time[i]), float(chunk.open[i]), float(chunk.high[i]),
+                                    float(chunk.low[i]), float(chunk.close[i]), float(chunk.volume[i]))
+        return events
+
+
+class _TailStrategy(StreamingStrategy):
+    """Keeps the last `lookback` closes so each chunk sees its full window."""
+
+    lookback = 0
+
+    def __init__(self):
+        self._tail = np.empty(0)
+
+    def _extend(self, chunk: Candles) -> np.ndarray:
+        closes = np.concatenate([self._tail, np.asarray(chunk.close, dtype=np.float64)])
+        self._tail = closes[max(0, len(closes) - self.lookback):] if self.lookback else np.empty(0)
+        return closes
+
+
+class MACrossoverStrategy(_TailStrategy):
+    """Long while SMA(short) > SMA(long), like the ma_crossover backtest."""
+
+    def __init__(self, short: int = 50, long: int = 200):
+        super().__init__()
+        self.short, self.long = int(short), int(long)
+        self.lookback = max(self.short, self.long) - 1
+        self._state: Optional[bool] = None
+
+    def on_chunk(self, chunk: Candles) -> np.ndarray:
+        offset = len(self._tail)
+        closes = self._extend(chunk)
+        fast = panel_sma(closes, self.short, min_periods=self.short)[offset:]
+        slow = panel_sma(closes, self.long, min_periods=self.long)[offset:]
+        state = fast > slow
+        if not len(state):
+            return np.zeros(0, dtype=np.int8)
+        # no event on the very first bar of the stream
+        prev = state[0] if self._state is None else self._state
+        self._state = bool(state[-1])
+        return np.diff(state.astype(np.int8), prepend=np.int8(prev)).astype(np.int8)
+
+
+class RSIStrategy(_TailStrategy):
+    """Enter below `oversold`, exit above `overbought` (simple-average RSI)."""
+
+    def __init__(self, oversold: float = 30, overbought: float = 70, period: int = 14):
+        super().__init__()
+        self.oversold, self.overbought, self.period = oversold, overbought, int(period)
+        self.lookback = self.period
+
+    def on_chunk(self, chunk: Candles) -> np.ndarray:
+        offset = len(self._tail)
+        rsi = panel_rsi(self._extend(chunk), self.period)[offset:]
+        return threshold_events(rsi, self.oversold, self.overbought)
+
+
+STRATEGIES = {"ma_crossover": MACrossoverStrategy, "rsi": RSIStrategy}
+
+
+def make_strategy(strategy: Optional[Dict[str, Any]] = None) -> StreamingStrategy:
+    """Streaming strategy from a backtest spec like {"type": "rsi", "params": {...}}."""
+    strategy = strategy or DEFAULT_STRATEGY
+    cls = STRATEGIES.get(strategy["type"])
+    if cls is None:
+        raise ValueError(f"Unknown strategy type: {strategy['type']!r}")
+    return cls(**strategy.get("params", {}))
+
+
+# -------------------------------------------------------
+# Bar sources
+# -------------------------------------------------------
+
+def chunked(bars: Iterable[Sequence[float]], chunk_bars: int = DEFAULT_CHUNK_BARS,
+            tz: Optional[str] = None) -> Iterator[Candles]:
+    """Group (ts_ns, open, high, low, close, volume) tuples from any generator into Candles chunks."""
+    buf: List[Sequence[float]] = []
+    for bar in bars:
+        buf.append(bar)
+        if len(buf) >= chunk_bars:
+            yield _to_candles(buf, tz)
+            buf = []
+    if buf:
+        yield _to_candles(buf, tz)
+
+
+def _to_candles(buf: List[Sequence[float]], tz: Optional[str]) -> Candles:
+    a = np.asarray(buf, dtype=np.float64)
+    times = np.fromiter((int(b[0]) for b in buf), dtype=np.int64, count=len(buf))
+    return Candles(times, a[:, 1], a[:, 2], a[:, 3], a[:, 4], a[:, 5], tz=tz)
+
+
+# -------------------------------------------------------
+# Engine
+# -------------------------------------------------------
+
+class StreamingBacktest:
+    """Feed chunks in order with feed(), or a whole stream with run()."""
+
+    def __init__(self, strategy: StreamingStrategy, initial_cash: float = INITIAL_CASH,
+                 record_trades: bool = True):
+        self.strategy = strategy
+        self.account = Account(initial_cash)
+        self.record_trades = record_trades
+        self.trades: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    def feed(self, chunk: Candles) -> None:
+        if not len(chunk):
+            return
+        events = self.strategy.on_chunk(chunk)
+        # carry the open position into the chunk: a leading synthetic event
+        carry = np.int8(1 if self.account.position else -1)
+        pos = positions(np.concatenate([[carry], events]))[1:]
+        out = self.account.step(chunk.close, pos)
+
+        if self.record_trades and len(out["fills"]):
+            stamps = pd.to_datetime(chunk.time[out["fills"]], unit="ns", utc=True)
+            if chunk.tz:
+                stamps = stamps.tz_convert(chunk.tz)
+            for i, side, ts in zip(out["fills"], out["sides"], stamps):
+                self.trades.append({
+                    "type": "BUY" if side > 0 else "SELL",
+                    "price": float(chunk.close[i]),
+                    "time": ts.isoformat(),
+                })
+
+    def run(self, chunks: Iterable[Candles]) -> Dict[str, Any]:
+        for chunk in chunks:
+            self.feed(chunk)
+        return self.result()
+
+    def result(self) -> Dict[str, Any]:
+        acct = self.account
+        balance = acct.balance
+        elapsed = time.perf_counter() - self._started
+        out = {
+            "bars": acct.bars,
+            "final_balance": round(balance, 2),
+            "profit": round(balance - acct.initial_cash, 2),
+            "return_pct": round((balance / acct.initial_cash - 1.0) * 100, 4),
+            "trades": acct.entries + acct.exits,
+            "max_drawdown_pct": round(acct.max_drawdown * 100, 4),
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "bars_per_sec": round(acct.bars / elapsed) if elapsed > 0 else None,
+        }
+        if self.record_trades:
+            out["trade_log"] = self.trades
+        return out
+
+
+def stream_backtest(
+    symbol: str,
+    strategy: Optional[Dict[str, Any]] = None,
+    interval: str = "1d",
+    chunk_bars: int = DEFAULT_CHUNK_BARS,
+    record_trades: bool = True,
+    progress: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Backtest the full history of `symbol` chunk by chunk from the candle
+    store. The store is brought up to date for period="max" first (a
+    shorter stored window is replaced by the full history once, stale bars
+    are topped up) without loading the series; the bars are then only read
+    through iter_chunks, so memory stays flat however long the history is.
+    progress: optional callback(fraction, {"bars", "balance"}) per chunk.
+    """
+    store = candle_store()
+    if store is None:
+        return {"error": "Candle store is disabled"}
+    meta = sync_candle_store(symbol, period="max", interval=interval)
+    if not meta:
+        return {"error": "No candle data"}
+
+    engine = StreamingBacktest(make_strategy(strategy), record_trades=record_trades)
+    total = int(meta.get("rows") or 0)
+    for chunk in store.iter_chunks(symbol, interval, chunk_bars):
+        engine.feed(chunk)
+        if progress is not None:
+            acct = engine.account
+            progress(min(1.0, acct.bars / total) if total else 0.0,
+                     {"bars": acct.bars, "balance": round(acct.balance, 2)})
+    return {"symbol": symbol.upper(), "interval": interval, **engine.result()}
+
+
+__all__ = [
+    "StreamingStrategy",
+    "MACrossoverStrategy",
+    "RSIStrategy",
+    "make_strategy",
+    "chunked",
+    "StreamingBacktest",
+    "stream_backtest",
+]
@@ -0,0 +1,235 @@
+# src/benchmarks/backtest_bench.py
+"""
+Reproducible throughput / memory benchmark for the backtest engine.
+
+    python -m src.benchmarks.backtest_bench [--sizes 1k,100k,10M]
+        [--strategies ma_crossover,rsi] [--history PATH] [--no-save] [--strict]
+
+Bars are synthetic OHLCV from a seeded random walk, so every run sees the
+same data. Sizes below STREAM_BARS run through engine.run_backtest on whole
+arrays; larger ones stream through StreamingBacktest from a chunk generator
+and never hold more than one chunk (their rate includes generating the bars,
+as reading the store would).
+
+Per (strategy, size) it records bars/sec (best timed run within TIME_BUDGET_SEC) and the
+tracemalloc peak (a separate run — tracing slows allocation). Each run is
+appended to the JSON history together with the commit and engine version,
+and compared with the latest earlier run of each case: throughput drops
+beyond REGRESSION_PCT, or a different final balance on the same engine
+version, are reported.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from src.backtesting.engine import run_backtest
+from src.backtesting.streaming import StreamingBacktest, make_strategy
+from src.config import BENCHMARK_HISTORY
+from src.services.backtest_cache import ENGINE_VERSION
+from src.services.candles import Candles
+
+DEFAULT_SIZES = (1_000, 100_000, 10_000_000)
+STRATEGIES: Dict[str, Dict[str, Any]] = {
+    "ma_crossover": {"type": "ma_crossover", "params": {"short": 50, "long": 200}},
+    "rsi": {"type": "rsi", "params": {"oversold": 30, "overbought": 70}},
+}
+STREAM_BARS = 1_000_000      # at or above this, stream instead of loading
+CHUNK_BARS = 100_000
+REGRESSION_PCT = 20.0
+TIME_BUDGET_SEC = 1.0        # timed repeats per in-memory case (best one counts)
+SEED = 42
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# -------------------------------------------------------
+# Synthetic data
+# -------------------------------------------------------
+
+def synthetic_chunks(bars: int, chunk_bars: int = CHUNK_BARS, seed: int = SEED) -> Iterator[Candles]:
+    """Seeded random-walk minute bars, `chunk_bars` at a time."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2000-01-03T09:30", "ns").astype(np.int64)
+    step = 60 * 10**9
+    last = 100.0
+    done = 0
+    while done < bars:
+        n = min(chunk_bars, bars - done)
+        close = last * np.exp(np.cumsum(rng.normal(0.0, 0.001, n)))
+        open_ = np.concatenate([[last], close[:-1]])
+        wick = np.abs(rng.normal(0.0, 0.0005, (2, n)))
+        high = np.maximum(open_, close) * (1.0 + wick[0])
+        low = np.minimum(open_, close) * (1.0 - wick[1])
+        volume = rng.integers(100, 10_000, n).astype(np.float64)
+        times = start + (done + np.arange(n, dtype=np.int64)) * step
+        yield Candles(times, open_, high, low, close, volume)
+        last = float(close[-1])
+        done += n
+
+
+def synthetic_candles(bars: int, seed: int = SEED) -> Candles:
+    return next(synthetic_chunks(bars, chunk_bars=bars, seed=seed))
+
+
+# -------------------------------------------------------
+# Cases
+# -------------------------------------------------------
+
+def _run_case(name: str, bars: int, candles: Optional[Candles]) -> float:
+    """One backtest; returns the final balance."""
+    if candles is not None:
+        return run_backtest(candles.close, STRATEGIES[name])["final_balance"]
+    engine = StreamingBacktest(make_strategy(STRATEGIES[name]), record_trades=False)
+    return engine.run(synthetic_chunks(bars))["final_balance"]
+
+
+def bench_case(name: str, bars: int, budget: float = TIME_BUDGET_SEC) -> Dict[str, Any]:
+    """Throughput and peak memory of one strategy at one size."""
+    stream = bars >= STREAM_BARS
+    candles = None if stream else synthetic_candles(bars)
+
+    # best of as many runs as fit the budget (at least 3; streams run once)
+    best, runs, started = float("inf"), 0, time.perf_counter()
+    while runs < (1 if stream else 3) or (not stream and time.perf_counter() - started < budget):
+        t0 = time.perf_counter()
+        balance = _run_case(name, bars, candles)
+        best = min(best, time.perf_counter() - t0)
+        runs += 1
+
+    tracemalloc.start()
+    try:
+        _run_case(name, bars, candles)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "strategy": name,
+        "bars": bars,
+        "mode": "stream" if stream else "memory",
+        "bars_per_sec": round(bars / best) if best > 0 else None,
+        "elapsed_ms": round(best * 1000, 2),
+        "runs": runs,
+        "peak_mb": round(peak / 2**20, 3),
+        "final_balance": balance,
+    }
+
+
+def run_suite(sizes=DEFAULT_SIZES, strategies=tuple(STRATEGIES)) -> Dict[str, Any]:
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": _commit(),
+        "engine_version": ENGINE_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": [bench_case(s, int(n)) for s in strategies for n in sizes],
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+# -------------------------------------------------------
+# History
+# -------------------------------------------------------
+
+def load_history(path: str = BENCHMARK_HISTORY) -> List[Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def save_run(run: Dict[str, Any], path: str = BENCHMARK_HISTORY) -> None:
+    history = load_history(path)
+    history.append(run)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def compare(history: List[Dict[str, Any]], current: Dict[str, Any],
+            threshold_pct: float = REGRESSION_PCT) -> List[str]:
+    """Human-readable regressions of `current` against the latest earlier run of each case."""
+    before: Dict[tuple, Dict[str, Any]] = {}
+    for run in history:
+        for r in run.get("results", []):
+            before[(r["strategy"], r["bars"])] = {**r, "engine_version": run.get("engine_version")}
+    problems = []
+    for row in current["results"]:
+        old = before.get((row["strategy"], row["bars"]))
+        if not old:
+            continue
+        label = f"{row['strategy']} @ {row['bars']:,} bars"
+        if old.get("bars_per_sec") and row["bars_per_sec"]:
+            drop = (1.0 - row["bars_per_sec"] / old["bars_per_sec"]) * 100
+            if drop > threshold_pct:
+                problems.append(f"{label}: {drop:.1f}% slower ({old['bars_per_sec']:,} → {row['bars_per_sec']:,} bars/s)")
+        same_engine = old["engine_version"] == current.get("engine_version")
+        if same_engine and old.get("final_balance") != row["final_balance"]:
+            problems.append(f"{label}: final balance changed ({old['final_balance']} → {row['final_balance']})")
+    return problems
+
+
+# -------------------------------------------------------
+# CLI
+# -------------------------------------------------------
+
+def _parse_size(text: str) -> int:
+    text = text.strip().lower()
+    scale = {"k": 10**3, "m": 10**6}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest engine benchmark")
+    parser.add_argument("--sizes", default="1k,100k,10M")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES))
+    parser.add_argument("--history", default=BENCHMARK_HISTORY)
+    parser.add_argument("--no-save", action="store_true", help="do not append to the history")
+    parser.add_argument("--strict", action="store_true", help="exit 1 on regressions")
+    args = parser.parse_args(argv)
+
+    sizes = [_parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in STRATEGIES]
+    if unknown:
+        parser.error(f"unknown strategies: {', '.join(unknown)}")
+
+    run = run_suite(sizes, strategies)
+    print(f"{'strategy':<14}{'bars':>12}  {'mode':<7}{'bars/sec':>14}{'ms':>11}{'peak MB':>10}")
+    for r in run["results"]:
+        print(f"{r['strategy']:<14}{r['bars']:>12,}  {r['mode']:<7}{r['bars_per_sec'] or 0:>14,}"
+              f"{r['elapsed_ms']:>11,.1f}{r['peak_mb']:>10.2f}")
+
+    problems = compare(load_history(args.history), run)
+    for p in problems:
+        print(f"REGRESSION {p}")
+    if not args.no_save:
+        save_run(run, args.history)
+        print(f"appended to {args.history}")
+    return 1 if problems and args.strict else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
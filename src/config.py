@@ -4,3 +4,80 @@ from dotenv import load_dotenv
 load_dotenv()
 
 FINNHUB_API_KEY = os.getenv("STOCKER_FINNHUB_KEY")
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ------------------------------
+# Market data caching
+# ------------------------------
+
+CANDLE_STORE_ENABLED = os.getenv("STOCKER_CANDLE_STORE", "1") not in ("0", "false", "False")
+CANDLE_STORE_DIR = os.getenv("STOCKER_CANDLE_DIR", os.path.join(_ROOT, "data", "candles"))
+# while the market is live: seconds a stored series is served as-is before a top-up
+CANDLE_REFRESH_SEC = float(os.getenv("STOCKER_CANDLE_REFRESH_SEC", "900"))
+
+# quote cache (get_stock_price / get_crypto_price); equity TTL applies while the market is live
+QUOTE_CACHE_TTL_SEC = float(os.getenv("STOCKER_QUOTE_TTL_SEC", "30"))
+CRYPTO_QUOTE_TTL_SEC = float(os.getenv("STOCKER_CRYPTO_QUOTE_TTL_SEC", "30"))
+QUOTE_CACHE_MAX = int(os.getenv("STOCKER_QUOTE_CACHE_MAX", "1024"))
+# stale-while-revalidate: how long past expiry a value is still served while it refreshes
+QUOTE_STALE_SEC = float(os.getenv("STOCKER_QUOTE_STALE_SEC", "120"))
+CANDLE_STALE_SEC = float(os.getenv("STOCKER_CANDLE_STALE_SEC", "3600"))
+# grace period after the close before bars are treated as final
+MARKET_SETTLE_SEC = float(os.getenv("STOCKER_MARKET_SETTLE_SEC", "1800"))
+
+# max parallel upstream downloads for get_stock_candles_many
+CANDLE_FETCH_WORKERS = int(os.getenv("STOCKER_CANDLE_FETCH_WORKERS", "8"))
+
+# ------------------------------
+# Market data provider
+# ------------------------------
+
+# "yfinance" (live) or "replay" (local files / synthetic bars, no network)
+MARKET_PROVIDER = os.getenv("STOCKER_MARKET_PROVIDER", "yfinance").lower()
+REPLAY_DIR = os.getenv("STOCKER_REPLAY_DIR", os.path.join(_ROOT, "data", "replay"))
+REPLAY_LATENCY_MS = float(os.getenv("STOCKER_REPLAY_LATENCY_MS", "0"))
+REPLAY_SYNTHETIC = os.getenv("STOCKER_REPLAY_SYNTHETIC", "1") not in ("0", "false", "False")
+
+# window downloaded on a store miss; any shorter period is sliced from it
+CANDLE_BASE_PERIOD = os.getenv("STOCKER_CANDLE_BASE_PERIOD", "1y")
+# decoded series kept in memory (per provider/symbol/interval)
+CANDLE_MEMORY_MAX = int(os.getenv("STOCKER_CANDLE_MEMORY_MAX", "256"))
+# keep in-memory prices as float32 (halves price memory; disk stays float64)
+CANDLE_FLOAT32 = os.getenv("STOCKER_CANDLE_FLOAT32", "0") in ("1", "true", "True")
+
+# ------------------------------
+# Background watchlist refresher
+# ------------------------------
+
+WATCHLIST = [s.strip().upper() for s in os.getenv("STOCKER_WATCHLIST", "AAPL,MSFT,NVDA,TSLA,GOOG").split(",") if s.strip()]
+WATCHLIST_REFRESH_SEC = float(os.getenv("STOCKER_WATCHLIST_REFRESH_SEC", "20"))
+
+# symbol resolution: how long an "unknown symbol" answer is trusted before re-probing
+UNKNOWN_SYMBOL_TTL_SEC = float(os.getenv("STOCKER_UNKNOWN_SYMBOL_TTL_SEC", "86400"))
+
+# ------------------------------
+# Indicator results
+# ------------------------------
+
+# computed indicator sets kept in memory, keyed by series fingerprint + specs
+INDICATOR_CACHE_MAX = int(os.getenv("STOCKER_INDICATOR_CACHE_MAX", "512"))
+
+# ------------------------------
+# Backtesting
+# ------------------------------
+
+# worker processes for parameter grids / walk-forward folds (0 = one per CPU)
+BACKTEST_WORKERS = int(os.getenv("STOCKER_BACKTEST_WORKERS", "0"))
+
+# finished backtests memoized in memory and in SQLite (backtest_results table)
+BACKTEST_CACHE_ENABLED = os.getenv("STOCKER_BACKTEST_CACHE", "1") not in ("0", "false", "False")
+BACKTEST_CACHE_MAX = int(os.getenv("STOCKER_BACKTEST_CACHE_MAX", "256"))
+
+# background backtest jobs: concurrent runs, queued + running cap, finished jobs kept in SQLite
+BACKTEST_JOB_WORKERS = int(os.getenv("STOCKER_BACKTEST_JOB_WORKERS", "2"))
+BACKTEST_JOB_QUEUE_MAX = int(os.getenv("STOCKER_BACKTEST_JOB_QUEUE_MAX", "32"))
+BACKTEST_JOB_KEEP = int(os.getenv("STOCKER_BACKTEST_JOB_KEEP", "200"))
+
+# backtest benchmark runs (python -m src.benchmarks.backtest_bench) are appended here
+BENCHMARK_HISTORY = os.getenv("STOCKER_BENCHMARK_HISTORY", os.path.join(_ROOT, "data", "benchmarks", "backtest_history.json"))
@@ -0,0 +1,78 @@
+# src/database/backtest_jobs.py
+from src.database.init_db import get_conn, init_backtest_jobs_table
+
+COLUMNS = ["job_id", "session_id", "kind", "request", "status", "progress", "partial",
+           "result", "error", "created_at", "started_at", "finished_at"]
+
+def create_job(job_id, session_id, kind, request, created_at):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""
+        INSERT INTO backtest_jobs (job_id, session_id, kind, request, status, progress, created_at)
+        VALUES (?, ?, ?, ?, 'queued', 0, ?)
+    """, (job_id, session_id, kind, request, created_at))
+    conn.commit()
+    conn.close()
+
+def update_job(job_id, **fields):
+    """Set any of the job columns (status, progress, partial, result, error, *_at)."""
+    fields = {k: v for k, v in fields.items() if k in COLUMNS and k != "job_id"}
+    if not fields:
+        return
+    conn = get_conn()
+    c = conn.cursor()
+    assignments = ", ".join(f"{k} = ?" for k in fields)
+    c.execute(f"UPDATE backtest_jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+    conn.commit()
+    conn.close()
+
+def get_job(job_id):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute(f"SELECT {', '.join(COLUMNS)} FROM backtest_jobs WHERE job_id = ?", (job_id,))
+    row = c.fetchone()
+    conn.close()
+    return dict(zip(COLUMNS, row)) if row else None
+
+def list_jobs(session_id=None, limit=20):
+    """Newest first, without the (possibly large) result and partial columns."""
+    cols = ["job_id", "session_id", "kind", "status", "progress", "error", "created_at", "started_at", "finished_at"]
+    conn = get_conn()
+    c = conn.cursor()
+    if session_id is None:
+        c.execute(f"SELECT {', '.join(cols)} FROM backtest_jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+    else:
+        c.execute(f"SELECT {', '.join(cols)} FROM backtest_jobs WHERE session_id = ? "
+                  f"ORDER BY created_at DESC LIMIT ?", (session_id, limit))
+    rows = c.fetchall()
+    conn.close()
+    return [dict(zip(cols, r)) for r in rows]
+
+def interrupt_unfinished(finished_at):
+    """Jobs left queued / running by a previous process can never finish: mark them failed."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""
+        UPDATE backtest_jobs SET status = 'failed', error = 'interrupted by a restart', finished_at = ?
+        WHERE status IN ('queued', 'running')
+    """, (finished_at,))
+    conn.commit()
+    conn.close()
+
+def prune_jobs(keep):
+    """Keep the newest `keep` jobs (queued / running ones are never dropped)."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""
+        DELETE FROM backtest_jobs WHERE status NOT IN ('queued', 'running') AND job_id NOT IN (
+            SELECT job_id FROM backtest_jobs ORDER BY created_at DESC LIMIT ?
+        )
+    """, (keep,))
+    conn.commit()
+    conn.close()
+
+# make sure the table exists even if init_db() was never run
+try:
+    init_backtest_jobs_table()
+except Exception:
+    pass
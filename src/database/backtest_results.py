@@ -0,0 +1,38 @@
+# src/database/backtest_results.py
+from src.database.init_db import get_conn, init_backtest_results_table
+
+def get_result(cache_key):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("SELECT result FROM backtest_results WHERE cache_key = ?", (cache_key,))
+    row = c.fetchone()
+    conn.close()
+    return row[0] if row else None
+
+def save_result(cache_key, scope, symbol, kind, result, created_at):
+    """Store a result; older results for the same scope (superseded data) are dropped."""
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM backtest_results WHERE scope = ? AND cache_key != ?", (scope, cache_key))
+    c.execute("""
+        INSERT OR REPLACE INTO backtest_results (cache_key, scope, symbol, kind, result, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (cache_key, scope, symbol, kind, result, created_at))
+    conn.commit()
+    conn.close()
+
+def clear_results(symbol=None):
+    conn = get_conn()
+    c = conn.cursor()
+    if symbol is None:
+        c.execute("DELETE FROM backtest_results")
+    else:
+        c.execute("DELETE FROM backtest_results WHERE symbol = ?", (symbol,))
+    conn.commit()
+    conn.close()
+
+# make sure the table exists even if init_db() was never run
+try:
+    init_backtest_results_table()
+except Exception:
+    pass
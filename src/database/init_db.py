@@ -105,6 +105,60 @@ def init_conversation_table():
     conn.commit()
     conn.close()
 
+def init_symbols_table():
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS symbols (
+            symbol TEXT PRIMARY KEY,
+            asset_class TEXT,
+            ticker TEXT,
+            resolved_at REAL
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+def init_backtest_results_table():
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS backtest_results (
+            cache_key TEXT PRIMARY KEY,
+            scope TEXT,
+            symbol TEXT,
+            kind TEXT,
+            result TEXT,
+            created_at REAL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_backtest_results_scope ON backtest_results (scope)")
+    conn.commit()
+    conn.close()
+
+def init_backtest_jobs_table():
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS backtest_jobs (
+            job_id TEXT PRIMARY KEY,
+            session_id TEXT,
+            kind TEXT,
+            request TEXT,
+            status TEXT,
+            progress REAL,
+            partial TEXT,
+            result TEXT,
+            error TEXT,
+            created_at REAL,
+            started_at REAL,
+            finished_at REAL
+        )
+    """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_backtest_jobs_created ON backtest_jobs (created_at)")
+    conn.commit()
+    conn.close()
+
 def init_db():
     init_positions_table()
     init_balance_table()
@@ -112,3 +166,6 @@ def init_db():
     init_pending_orders_table()
     init_executed_orders_table()
     init_conversation_table()
+    init_symbols_table()
+    init_backtest_results_table()
+    init_backtest_jobs_table()
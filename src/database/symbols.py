@@ -0,0 +1,36 @@
+# src/database/symbols.py
+from src.database.init_db import get_conn, init_symbols_table
+
+def get_symbol(symbol):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("SELECT symbol, asset_class, ticker, resolved_at FROM symbols WHERE symbol = ?", (symbol,))
+    row = c.fetchone()
+    conn.close()
+    if not row:
+        return None
+    cols = ["symbol", "asset_class", "ticker", "resolved_at"]
+    return dict(zip(cols, row))
+
+def save_symbol(symbol, asset_class, ticker, resolved_at):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("""
+        INSERT OR REPLACE INTO symbols (symbol, asset_class, ticker, resolved_at)
+        VALUES (?, ?, ?, ?)
+    """, (symbol, asset_class, ticker, resolved_at))
+    conn.commit()
+    conn.close()
+
+def delete_symbol(symbol):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM symbols WHERE symbol = ?", (symbol,))
+    conn.commit()
+    conn.close()
+
+# make sure the table exists even if init_db() was never run
+try:
+    init_symbols_table()
+except Exception:
+    pass
@@ -13,6 +13,11 @@ from fastapi import Body
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from src.orchestrator import orch
+from src.services.market_data import cache_stats
+from src.services.indicators import indicator_cache_stats
+from src.services.backtest_cache import backtest_cache_stats
+from src.services.watchlist import refresher
+from src.services.jobs import jobs
 
 # ------------------------------
 # Metrics Storage
@@ -35,6 +40,22 @@ app = FastAPI(
     description="AI-powered trading assistant with indicators, strategies, backtests, and observability."
 )
 
+# ------------------------------
+# Background watchlist refresh
+# ------------------------------
+
+@app.on_event("startup")
+async def start_watchlist():
+    refresher.start()
+
+@app.on_event("shutdown")
+async def stop_watchlist():
+    await refresher.stop()
+
+@app.on_event("shutdown")
+async def stop_backtest_jobs():
+    jobs.shutdown()
+
 # ------------------------------
 # Helper — update metrics
 # ------------------------------
@@ -119,7 +140,12 @@ async def handle_api(body: Dict = Body(...)):
 
 @app.get("/metrics")
 def get_metrics():
-    return METRICS
+    return {
+        **METRICS,
+        "caches": {**cache_stats(), "indicators": indicator_cache_stats(), "backtests": backtest_cache_stats()},
+        "watchlist": refresher.stats,
+        "backtest_jobs": jobs.job_stats(),
+    }
 
 # ------------------------------
 # Health Check
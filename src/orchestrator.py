@@ -3,19 +3,34 @@ FINAL ORCHESTRATOR — stable, JSON-safe, fully compatible with FastAPI + UI.
 
 Supports intents:
 - candles          → chart data + indicators
+- live_indicators  → latest SMA/EMA/RSI from the streaming indicator engine
 - generate_strategy → natural-language strategy generation
-- backtest         → (backend ready, UI can call)
+- backtest         → (backend ready, UI can call; mode=walk_forward for rolling folds,
+                     mode=stream for the full stored history in chunks,
+                     mode=monte_carlo for bootstrapped outcome bands)
+- backtest_grid    → ranked parameter sweep for a strategy type
+- backtest_portfolio → strategy across a basket with rebalancing
+- backtest_submit  → run any of the three above as a background job (kind=...)
+- backtest_status / backtest_cancel / backtest_jobs → poll, stop, list jobs
 """
 
 from typing import Any, Dict, Optional
 import traceback
 import time
+import numpy as np
 import pandas as pd
 
 from src.agents.strategy_generator import StrategyGenerator
-from src.services.indicators import get_indicators, add_indicators
-from src.services.market_data import get_stock_candles, get_stock_price
+from src.services.indicators import get_indicators, indicator_arrays
+from src.services.indicator_engine import live_indicators
+from src.services.market_data import get_stock_candle_arrays, get_stock_price
 from src.services.backtest import backtest
+from src.backtesting.streaming import stream_backtest
+from src.backtesting.monte_carlo import monte_carlo_backtest
+from src.services.optimize import backtest_grid, walk_forward
+from src.services.portfolio import backtest_portfolio
+from src.services.jobs import jobs
+from src.services.symbol_resolver import resolve_symbol
 
 
 # -------------------------------------------------------
@@ -61,6 +76,10 @@ class Orchestrator:
             if intent == "candles":
                 return self._handle_candles(session_id, payload)
 
+            # ========== LIVE INDICATORS ==========
+            if intent == "live_indicators":
+                return self._handle_live_indicators(session_id, payload)
+
             # ========== STRATEGY GENERATION ==========
             if intent == "generate_strategy":
                 return self._handle_strategy(session_id, payload, message)
@@ -69,6 +88,18 @@ class Orchestrator:
             if intent == "backtest":
                 return self._handle_backtest(session_id, payload)
 
+            # ========== PARAMETER GRID ==========
+            if intent == "backtest_grid":
+                return self._handle_backtest_grid(session_id, payload)
+
+            # ========== PORTFOLIO BACKTEST ==========
+            if intent == "backtest_portfolio":
+                return self._handle_backtest_portfolio(session_id, payload)
+
+            # ========== BACKTEST JOBS ==========
+            if intent in ("backtest_submit", "backtest_status", "backtest_cancel", "backtest_jobs"):
+                return self._handle_backtest_job(session_id, intent, payload)
+
             # Unknown intent
             return {
                 "session_id": session_id,
@@ -94,34 +125,32 @@ class Orchestrator:
         period = payload.get("period", "6mo")
 
         try:
-            df = get_stock_candles(symbol, period=period)
-
-            if df is None or df.empty:
+            resolved = resolve_symbol(symbol)
+            if resolved["asset_class"] == "unknown":
                 return {
                     "session_id": session_id,
                     "response": {"error": f"No candle data for {symbol}."}
                 }
 
-            # Add indicators (SMA/EMA/RSI)
-            df = add_indicators(df)
+            bars = get_stock_candle_arrays(resolved["ticker"], period=period)
 
-            # --------- Build indicator arrays ----------
-            indicators = {}
-
-            if "SMA50" in df and "SMA200" in df:
-                indicators["sma"] = {
-                    "sma50": df["SMA50"].astype(float).tolist(),
-                    "sma200": df["SMA200"].astype(float).tolist()
+            if not len(bars):
+                return {
+                    "session_id": session_id,
+                    "response": {"error": f"No candle data for {symbol}."}
                 }
 
-            if "EMA20" in df:
-                indicators["ema"] = {
-                    "ema20": df["EMA20"].astype(float).tolist()
-                }
+            # Only the overlays the chart asked for (default: SMA/EMA/RSI),
+            # memoized per bar so reloading the chart does not recompute them
+            groups = indicator_arrays(resolved["ticker"], bars, payload.get("indicators"))
+            df = bars.to_frame()
 
-            if "RSI" in df:
-                indicators["momentum"] = {
-                    "rsi": df["RSI"].astype(float).tolist()
+            # --------- Build indicator arrays ----------
+            indicators = {}
+            for group, columns in groups.items():
+                indicators[group] = {
+                    col.lower(): [None if np.isnan(v) else float(v) for v in values]
+                    for col, values in columns.items()
                 }
 
             # --------- SAFE CANDLES (important!) ----------
@@ -149,6 +178,34 @@ class Orchestrator:
                 }
             }
 
+    def _handle_live_indicators(self, session_id: str, payload: Dict[str, Any]):
+        symbol = payload.get("symbol", "AAPL").upper()
+        interval = payload.get("interval", "1d")
+
+        resolved = resolve_symbol(symbol)
+        if resolved["asset_class"] == "unknown":
+            return {
+                "session_id": session_id,
+                "response": {"error": f"No candle data for {symbol}."}
+            }
+
+        # folds in only bars the engine has not seen (state is checkpointed)
+        values = live_indicators(resolved["ticker"], interval=interval)
+        if not values:
+            return {
+                "session_id": session_id,
+                "response": {"error": f"No candle data for {symbol}."}
+            }
+
+        return {
+            "session_id": session_id,
+            "response": {
+                "symbol": symbol,
+                "interval": interval,
+                "indicators": {k: None if np.isnan(v) else float(v) for k, v in values.items()}
+            }
+        }
+
     # =====================================================
     # 2) STRATEGY GENERATION
     # =====================================================
@@ -165,11 +222,19 @@ class Orchestrator:
         timeframe = payload.get("timeframe", "6mo")
         symbol = payload.get("symbol")
 
+        # --------- RESOLVE: equity vs crypto ticker (cached) ---------
+        ticker = None
+        if symbol:
+            try:
+                ticker = resolve_symbol(symbol)["ticker"]
+            except Exception:
+                ticker = symbol
+
         # --------- ENRICH: Indicators for context ---------
         indicators = {}
         try:
-            if symbol:
-                indicators = get_indicators(symbol, timeframe)
+            if ticker:
+                indicators = get_indicators(ticker, timeframe)
         except Exception:
             indicators = {}
 
@@ -196,7 +261,10 @@ class Orchestrator:
         price_snapshot = None
         if symbol:
             try:
-                sp = get_stock_price(symbol)
+                if ticker:
+                    sp = get_stock_price(ticker)
+                else:
+                    sp = {"error": f"Unknown symbol {symbol}"}
                 price_snapshot = sp
             except:
                 price_snapshot = {"error": "price_failed"}
@@ -223,12 +291,36 @@ class Orchestrator:
     # 3) BACKTEST HANDLER
     # =====================================================
 
-    def _handle_backtest(self, session_id, payload):
+    def _backtest_result(self, payload, progress=None):
         symbol = payload.get("symbol", "AAPL")
         strategy = payload.get("strategy")
 
+        if payload.get("mode") == "walk_forward":
+            wf = {k: payload[k] for k in ("train_bars", "test_bars", "step", "metric", "period") if k in payload}
+            return walk_forward(
+                symbol,
+                (strategy or {}).get("type", "ma_crossover"),
+                grid=payload.get("grid"),
+                progress=progress,
+                **wf
+            )
+        if payload.get("mode") == "stream":
+            return stream_backtest(
+                symbol,
+                strategy,
+                interval=payload.get("interval", "1d"),
+                record_trades=payload.get("record_trades", True),
+                progress=progress,
+            )
+        if payload.get("mode") == "monte_carlo":
+            mc = {k: payload[k] for k in ("period", "resample", "paths", "block", "seed") if k in payload}
+            return monte_carlo_backtest(symbol, strategy, progress=progress, **mc)
+        return backtest(symbol, strategy, progress=progress,
+                        **({"period": payload["period"]} if "period" in payload else {}))
+
+    def _handle_backtest(self, session_id, payload):
         try:
-            result = backtest(symbol, strategy)
+            result = self._backtest_result(payload)
             return {
                 "session_id": session_id,
                 "response": result
@@ -243,6 +335,100 @@ class Orchestrator:
                 }
             }
 
+    # =====================================================
+    # 4) PARAMETER GRID HANDLER
+    # =====================================================
+
+    def _grid_result(self, payload, progress=None):
+        return backtest_grid(
+            payload.get("symbol", "AAPL"),
+            payload.get("type", "ma_crossover"),
+            grid=payload.get("grid"),
+            period=payload.get("period", "1y"),
+            top=payload.get("top", 20),
+            progress=progress,
+        )
+
+    def _handle_backtest_grid(self, session_id, payload):
+        try:
+            result = self._grid_result(payload)
+            return {
+                "session_id": session_id,
+                "response": result
+            }
+        except Exception as e:
+            return {
+                "session_id": session_id,
+                "response": {
+                    "error": "backtest_grid_failed",
+                    "details": str(e),
+                    "trace": traceback.format_exc()
+                }
+            }
+
+    # =====================================================
+    # 5) PORTFOLIO BACKTEST HANDLER
+    # =====================================================
+
+    def _portfolio_result(self, payload, progress=None):
+        return backtest_portfolio(
+            payload.get("symbols") or ["AAPL", "MSFT"],
+            strategy=payload.get("strategy"),
+            period=payload.get("period", "1y"),
+            rebalance=payload.get("rebalance", "monthly"),
+            weights=payload.get("weights"),
+            progress=progress,
+        )
+
+    def _handle_backtest_portfolio(self, session_id, payload):
+        try:
+            result = self._portfolio_result(payload)
+            return {
+                "session_id": session_id,
+                "response": result
+            }
+        except Exception as e:
+            return {
+                "session_id": session_id,
+                "response": {
+                    "error": "backtest_portfolio_failed",
+                    "details": str(e),
+                    "trace": traceback.format_exc()
+                }
+            }
+
+    # =====================================================
+    # 6) BACKTEST JOBS (submit / poll / cancel / list)
+    # =====================================================
+
+    def _handle_backtest_job(self, session_id, intent, payload):
+        if intent == "backtest_submit":
+            runners = {
+                "backtest": self._backtest_result,
+                "backtest_grid": self._grid_result,
+                "backtest_portfolio": self._portfolio_result,
+            }
+            kind = payload.get("kind", "backtest")
+            runner = runners.get(kind)
+            if runner is None:
+                response = {"error": f"Unknown job kind '{kind}'; use one of {', '.join(runners)}"}
+            else:
+                response = jobs.submit(kind, lambda progress: runner(payload, progress),
+                                       request=payload, session_id=session_id)
+
+        elif intent == "backtest_jobs":
+            response = {"jobs": jobs.list(session_id, int(payload.get("limit", 20)))}
+
+        else:
+            job_id = payload.get("job_id")
+            job = jobs.cancel(job_id) if intent == "backtest_cancel" else jobs.status(job_id)
+            response = job if job is not None else {"error": f"Unknown job '{job_id}'"}
+
+        return {
+            "session_id": session_id,
+            "response": response
+        }
+
 
 # Singleton instance
 orch = Orchestrator()
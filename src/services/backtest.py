@@ -1,82 +1,57 @@
 # src/services/backtest.py
-import pandas as pd
-from src.services.market_data import get_stock_candles
-from src.services.indicators import add_indicators
+from src.backtesting.engine import DEFAULT_STRATEGY, run_backtest
+from src.backtesting.metrics import periods_per_year
+from src.services.backtest_cache import cached_backtest
+from src.services.market_data import get_stock_candle_arrays
+from src.services.indicators import rsi_array
 
-def backtest(symbol="AAPL", strategy=None):
-    df = get_stock_candles(symbol)
-    if df.empty:
-        return {"error": "No candle data"}
 
-    df = add_indicators(df)
+def backtest(symbol="AAPL", strategy=None, period="6mo", progress=None):
+    """progress: optional callback(fraction, None) at each stage (for background jobs)."""
+    candles = get_stock_candle_arrays(symbol, period=period)
+    if not len(candles):
+        return {"error": "No candle data"}
+    if progress is not None:
+        progress(0.25)
 
     if strategy is None:
-        strategy = {
-            "type": "ma_crossover",
-            "params": {"short": 50, "long": 200}
-        }
-
-    stype = strategy["type"]
-    params = strategy["params"]
-
-    df["position"] = 0
-    df["signal"] = 0
-
-    # MA CROSSOVER
-    if stype == "ma_crossover":
-        short = params["short"]
-        long = params["long"]
+        strategy = DEFAULT_STRATEGY
 
-        df["SMA_short"] = df["close"].rolling(short).mean()
-        df["SMA_long"] = df["close"].rolling(long).mean()
-        df["position"] = (df["SMA_short"] > df["SMA_long"]).astype(int)
-        df["signal"] = df["position"].diff().fillna(0)
+    # same bars + same strategy -> stored result (memory / SQLite)
+    spec = {"strategy": strategy, "period": period}
+    return cached_backtest("backtest", symbol, candles, spec, lambda: _run(symbol, candles, strategy, progress),
+                           coalesce=progress is None)
 
-    # RSI REVERSAL
-    elif stype == "rsi":
-        oversold = params["oversold"]
-        overbought = params["overbought"]
 
-        in_pos = False
-        signals = []
+def _run(symbol, candles, strategy, progress=None):
+    rsi = None
+    if strategy["type"] == "rsi":
+        # memoized per bar, for the strategy's own period
+        rsi = rsi_array(symbol, candles, strategy.get("params", {}).get("period", 14))
+    if progress is not None:
+        progress(0.5)
+    result = run_backtest(candles.close, strategy, rsi=rsi, periods=periods_per_year(candles.time))
+    if progress is not None:
+        progress(0.9)
 
-        for r in df["RSI"]:
-            if not in_pos and r < oversold:
-                signals.append(1)
-                in_pos = True
-            elif in_pos and r > overbought:
-                signals.append(-1)
-                in_pos = False
-            else:
-                signals.append(0)
+    def stamp(i):
+        return candles[i:i + 1].last_time().isoformat()
 
-        df["signal"] = signals
-        df["position"] = pd.Series(signals).cumsum().clip(lower=0).apply(lambda x: 1 if x > 0 else 0)
-
-    # simulate trades
-    balance = 10000
-    shares = 0
     trades = []
-
-    for _, row in df.iterrows():
-        price = row["close"]
-
-        if row["signal"] == 1 and balance > 0:
-            shares = balance / price
-            balance = 0
-            trades.append({"type": "BUY", "price": float(price)})
-
-        elif row["signal"] == -1 and shares > 0:
-            balance = shares * price
-            shares = 0
-            trades.append({"type": "SELL", "price": float(price)})
-
-    if shares > 0:
-        balance = shares * df["close"].iloc[-1]
+    for t in result["round_trips"]:
+        trades.append({"type": "BUY", "price": t["entry_price"], "time": stamp(t["entry_bar"])})
+        if not t["open"]:
+            trades.append({"type": "SELL", "price": t["exit_price"], "time": stamp(t["exit_bar"]),
+                           "pnl": t["pnl"]})
 
     return {
         "symbol": symbol,
-        "final_balance": round(balance, 2),
-        "profit": round(balance - 10000, 2),
+        "final_balance": result["final_balance"],
+        "profit": result["profit"],
+        "return_pct": result["return_pct"],
+        "max_drawdown_pct": result["max_drawdown_pct"],
+        "wins": result["wins"],
+        "losses": result["losses"],
+        "metrics": result["metrics"],
         "trades": trades
     }
@@ -0,0 +1,99 @@
+# src/services/backtest_cache.py
+"""
+Memoized backtest results.
+
+A result is keyed by what it depends on: the kind of run, the symbol, the
+data (Candles.fingerprint(): bar range + hash of the last bar), the
+strategy spec and ENGINE_VERSION. It is kept in memory (LRU) and in the
+SQLite backtest_results table, so repeated runs — across restarts too —
+skip fetching indicators and simulating.
+
+New bars change the fingerprint, so stale results are never served; when a
+new result is saved, older rows for the same scope (same run minus data)
+are deleted.
+"""
+
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict
+
+from src.config import BACKTEST_CACHE_ENABLED, BACKTEST_CACHE_MAX
+from src.database.backtest_results import get_result, save_result, clear_results
+from src.services.candles import Candles
+from src.utils.cache import TTLCache
+
+# bump whenever signal or simulation semantics change, to retire old results
+ENGINE_VERSION = "4"
+
+_memory = TTLCache(ttl=None, maxsize=BACKTEST_CACHE_MAX)
+
+
+def _digest(obj: Any) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def result_key(kind: str, symbol: str, candles: Candles, spec: Dict[str, Any]) -> Dict[str, str]:
+    """{"scope": run identity without the data, "key": scope + data fingerprint}."""
+    scope = _digest([ENGINE_VERSION, kind, symbol.upper(), spec])
+    return {"scope": scope, "key": _digest([scope, list(candles.fingerprint())])}
+
+
+def cached_backtest(kind: str, symbol: str, candles: Candles, spec: Dict[str, Any],
+                    compute: Callable[[], Dict[str, Any]], coalesce: bool = True) -> Dict[str, Any]:
+    """
+    Return the stored result for (kind, symbol, data, spec) or compute and
+    store it. Error results are not stored. Every call gets its own copy.
+
+    Concurrent identical calls share one computation. Pass coalesce=False
+    when `compute` reports progress / can be cancelled (background jobs):
+    it then runs on its own, so cancelling it never fails other callers.
+    """
+    if not BACKTEST_CACHE_ENABLED:
+        return compute()
+
+    ids = result_key(kind, symbol, candles, spec)
+
+    def load() -> str:
+        try:
+            stored = get_result(ids["key"])
+        except Exception:
+            stored = None
+        if stored is not None:
+            return stored
+        result = compute()
+        text = json.dumps(result, default=str)
+        if "error" not in result:
+            try:
+                save_result(ids["key"], ids["scope"], symbol.upper(), kind, text, time.time())
+            except Exception:
+                pass  # memory still has it for this process
+        return text
+
+    if coalesce:
+        text = _memory.get_or_load(ids["key"], load)
+    else:
+        text = _memory.get(ids["key"])
+        if text is None:
+            text = load()
+            _memory.set(ids["key"], text)
+    result = json.loads(text)
+    if "error" in result:
+        _memory.invalidate(ids["key"])
+    return result
+
+
+def backtest_cache_stats() -> Dict[str, Any]:
+    return _memory.stats()
+
+
+def clear_backtest_cache(symbol: str = None) -> None:
+    """Drop stored results (all, or one symbol's on disk)."""
+    _memory.clear()
+    try:
+        clear_results(symbol.upper() if symbol else None)
+    except Exception:
+        pass
+
+
+__all__ = ["ENGINE_VERSION", "result_key", "cached_backtest", "backtest_cache_stats", "clear_backtest_cache"]
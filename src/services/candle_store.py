@@ -0,0 +1,209 @@
+# src/services/candle_store.py
+"""
+On-disk OHLCV candle store.
+
+Layout (one directory per symbol/interval):
+
+    <root>/<interval>/<SYMBOL>/time.npy      int64 epoch nanoseconds (UTC)
+    <root>/<interval>/<SYMBOL>/open.npy      float64
+    ...                        high/low/close/volume
+    <root>/<interval>/<SYMBOL>/meta.json     tz, coverage, last fetch time
+
+Columns are plain .npy files so reads are memory-mapped straight from disk —
+no parsing and no network round trip. Reads come back as Candles arrays.
+"""
+
+import json
+import os
+import time
+from threading import Lock, RLock
+from typing import Any, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.services.candles import Candles
+
+COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# bars copied at a time when appending, so an append never holds a whole column
+_COPY_BARS = 1_000_000
+
+
+def _to_epoch_ns(times: pd.Series) -> np.ndarray:
+    """Timestamps (naive or tz-aware) → int64 nanoseconds since epoch (UTC)."""
+    return pd.DatetimeIndex(times).as_unit("ns").asi8.astype(np.int64)
+
+
+class CandleStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[str, RLock] = {}
+        self._locks_guard = Lock()
+
+    # --------------------------------------------------
+    # Paths / locking
+    # --------------------------------------------------
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, interval, symbol.upper())
+
+    def _lock(self, symbol: str, interval: str) -> RLock:
+        key = f"{interval}/{symbol.upper()}"
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = RLock()
+            return self._locks[key]
+
+    def state_path(self, symbol: str, interval: str, name: str) -> str:
+        """Path for auxiliary per-series state kept next to the bars (e.g. indicator checkpoints)."""
+        return os.path.join(self._dir(symbol, interval), f"{name}.json")
+
+    # --------------------------------------------------
+    # Read
+    # --------------------------------------------------
+
+    def meta(self, symbol: str, interval: str = "1d") -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._dir(symbol, interval), "meta.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def load_candles(self, symbol: str, interval: str = "1d", float32: bool = False) -> Optional[Candles]:
+        """Return the stored series as Candles arrays, or None."""
+        d = self._dir(symbol, interval)
+        dtype = np.float32 if float32 else np.float64
+        with self._lock(symbol, interval):
+            meta = self.meta(symbol, interval)
+            if not meta:
+                return None
+            try:
+                t = np.load(os.path.join(d, "time.npy"), mmap_mode="r")
+                cols = [np.load(os.path.join(d, f"{c}.npy"), mmap_mode="r") for c in COLUMNS]
+            except (OSError, ValueError):
+                return None
+
+            # copy out of the maps so the files can be replaced while arrays are alive
+            return Candles(np.array(t), *(np.array(c, dtype=dtype) for c in cols), tz=meta.get("tz"))
+
+    def iter_chunks(self, symbol: str, interval: str = "1d", chunk_bars: int = 100_000,
+                    float32: bool = False) -> Iterator[Candles]:
+        """
+        Yield the stored series as consecutive Candles of up to `chunk_bars`
+        bars. The files are memory-mapped and only one chunk is copied out at
+        a time, so memory stays flat however long the series is.
+        """
+        d = self._dir(symbol, interval)
+        dtype = np.float32 if float32 else np.float64
+        with self._lock(symbol, interval):
+            meta = self.meta(symbol, interval)
+            if not meta:
+                return
+            try:
+                # maps stay valid even if a writer replaces the files meanwhile
+                t = np.load(os.path.join(d, "time.npy"), mmap_mode="r")
+                cols = [np.load(os.path.join(d, f"{c}.npy"), mmap_mode="r") for c in COLUMNS]
+            except (OSError, ValueError):
+                return
+        step = max(1, int(chunk_bars))
+        for i in range(0, len(t), step):
+            j = i + step
+            yield Candles(np.array(t[i:j]), *(np.array(c[i:j], dtype=dtype) for c in cols), tz=meta.get("tz"))
+
+    def load(self, symbol: str, interval: str = "1d") -> Optional[pd.DataFrame]:
+        """Return the stored series as a DataFrame (time + OHLCV), or None."""
+        candles = self.load_candles(symbol, interval)
+        return candles.to_frame() if candles is not None else None
+
+    # --------------------------------------------------
+    # Write
+    # --------------------------------------------------
+
+    def write(self, symbol: str, interval: str, df: pd.DataFrame, **meta: Any) -> None:
+        """Replace the stored series with `df` (must have time + OHLCV)."""
+        with self._lock(symbol, interval):
+            self._write_unlocked(symbol, interval, df, meta)
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame, **meta: Any) -> None:
+        """
+        Merge newer bars into the stored series.
+
+        Stored bars at or after the first new timestamp are replaced, so a
+        partial (still-forming) last bar is overwritten by its final value.
+        The stored columns are copied through memory maps, a slice at a
+        time: the existing series is never loaded as a whole.
+        """
+        with self._lock(symbol, interval):
+            old_meta = self.meta(symbol, interval)
+            if not old_meta:
+                if df is not None and not df.empty:
+                    self._write_unlocked(symbol, interval, df, meta)
+                return
+            if df is None or df.empty:
+                self._write_meta(symbol, interval, {**old_meta, **meta})
+                return
+
+            d = self._dir(symbol, interval)
+            new = {"time": _to_epoch_ns(df["time"])}
+            for c in COLUMNS:
+                new[c] = df[c].to_numpy(dtype=np.float64)
+            try:
+                stored_t = np.load(os.path.join(d, "time.npy"), mmap_mode="r")
+            except (OSError, ValueError):
+                self._write_unlocked(symbol, interval, df, {**old_meta, **meta})
+                return
+            keep = int(np.searchsorted(stored_t, new["time"][0], side="left"))
+            del stored_t
+
+            for name, arr in new.items():
+                path = os.path.join(d, f"{name}.npy")
+                tmp = os.path.join(d, f"{name}.tmp.npy")
+                old = np.load(path, mmap_mode="r")
+                out = np.lib.format.open_memmap(tmp, mode="w+", dtype=old.dtype, shape=(keep + len(arr),))
+                for i in range(0, keep, _COPY_BARS):
+                    out[i:min(i + _COPY_BARS, keep)] = old[i:min(i + _COPY_BARS, keep)]
+                out[keep:] = arr
+                out.flush()
+                del out, old
+                os.replace(tmp, path)
+
+            meta = {**old_meta, **meta, "rows": keep + len(new["time"]), "last_ts": int(new["time"][-1])}
+            self._write_meta(symbol, interval, meta)
+
+    def _write_unlocked(self, symbol: str, interval: str, df: pd.DataFrame, meta: Dict[str, Any]) -> None:
+        d = self._dir(symbol, interval)
+        os.makedirs(d, exist_ok=True)
+
+        tz = getattr(df["time"].dt, "tz", None)
+        arrays = {"time": _to_epoch_ns(df["time"])}
+        for c in COLUMNS:
+            arrays[c] = df[c].to_numpy(dtype=np.float64)
+
+        # write to temp files then swap in, so readers never see a torn column
+        for name, arr in arrays.items():
+            tmp = os.path.join(d, f"{name}.tmp.npy")
+            np.save(tmp, arr)
+            os.replace(tmp, os.path.join(d, f"{name}.npy"))
+
+        meta = dict(meta)
+        meta.update({
+            "symbol": symbol.upper(),
+            "interval": interval,
+            "tz": str(tz) if tz is not None else None,
+            "rows": int(len(df)),
+            "last_ts": int(arrays["time"][-1]) if len(df) else None,
+        })
+        meta.setdefault("fetched_at", time.time())
+        self._write_meta(symbol, interval, meta)
+
+    def _write_meta(self, symbol: str, interval: str, meta: Dict[str, Any]) -> None:
+        d = self._dir(symbol, interval)
+        tmp = os.path.join(d, "meta.tmp.json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(d, "meta.json"))
+
+
+__all__ = ["CandleStore", "COLUMNS"]
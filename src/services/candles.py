@@ -0,0 +1,113 @@
+# src/services/candles.py
+"""
+Compact OHLCV container shared by the candle store, indicators and backtests.
+
+Bars live in contiguous numpy arrays: int64 epoch nanoseconds (UTC) for time
+and float64 — or float32 when memory matters more than the last digits — for
+prices and volume. Slicing returns views, and to_frame() adapts to the
+DataFrame shape the rest of the app uses (time/open/high/low/close/volume).
+"""
+
+import zlib
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class Candles:
+    __slots__ = ("time", "open", "high", "low", "close", "volume", "tz")
+
+    def __init__(self, time, open, high, low, close, volume, tz: Optional[str] = None):
+        self.time = np.asarray(time, dtype=np.int64)
+        self.open = np.asarray(open)
+        self.high = np.asarray(high)
+        self.low = np.asarray(low)
+        self.close = np.asarray(close)
+        self.volume = np.asarray(volume)
+        self.tz = tz
+
+    # --------------------------------------------------
+    # Construction / conversion
+    # --------------------------------------------------
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, float32: bool = False) -> "Candles":
+        """Build from a time/open/high/low/close/volume frame."""
+        dtype = np.float32 if float32 else np.float64
+        if df is None or df.empty:
+            return cls.empty(dtype)
+        times = pd.DatetimeIndex(df["time"])
+        tz = str(times.tz) if times.tz is not None else None
+        return cls(
+            times.as_unit("ns").asi8,
+            *(df[f].to_numpy(dtype=dtype) for f in PRICE_FIELDS),
+            tz=tz,
+        )
+
+    @classmethod
+    def empty(cls, dtype=np.float64) -> "Candles":
+        z = np.empty(0, dtype=dtype)
+        return cls(np.empty(0, dtype=np.int64), z, z, z, z, z)
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame view for code that still works on frames."""
+        if self.tz:
+            times = pd.to_datetime(self.time, unit="ns", utc=True).tz_convert(self.tz)
+        else:
+            times = pd.to_datetime(self.time, unit="ns")
+        data = {"time": times}
+        for f in PRICE_FIELDS:
+            data[f] = getattr(self, f)
+        return pd.DataFrame(data)
+
+    def astype(self, dtype) -> "Candles":
+        return Candles(self.time, *(getattr(self, f).astype(dtype, copy=False) for f in PRICE_FIELDS), tz=self.tz)
+
+    # --------------------------------------------------
+    # Access
+    # --------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, key: slice) -> "Candles":
+        """Row slice; the arrays are views, nothing is copied."""
+        if not isinstance(key, slice):
+            raise TypeError("Candles only support slice indexing")
+        return Candles(self.time[key], *(getattr(self, f)[key] for f in PRICE_FIELDS), tz=self.tz)
+
+    def since(self, ts: pd.Timestamp) -> "Candles":
+        """Bars at or after `ts` (a view)."""
+        ts = pd.Timestamp(ts)
+        if ts.tzinfo is None and self.tz:
+            ts = ts.tz_localize(self.tz)
+        cutoff = ts.as_unit("ns").value
+        return self[int(np.searchsorted(self.time, cutoff, side="left")):]
+
+    def last_time(self) -> Optional[pd.Timestamp]:
+        if not len(self):
+            return None
+        ts = pd.Timestamp(int(self.time[-1]), unit="ns", tz="UTC")
+        return ts.tz_convert(self.tz) if self.tz else ts.tz_localize(None)
+
+    def fingerprint(self) -> tuple:
+        """
+        Cheap identity of the data: bar count, first/last timestamp and a hash
+        of the last bar (which may still be forming). Any new or revised
+        last bar changes it; stable across processes, so it can key disk caches.
+        """
+        if not len(self):
+            return (0,)
+        last = np.array([f[-1] for f in (self.open, self.high, self.low, self.close, self.volume)],
+                        dtype=np.float64)
+        return len(self), int(self.time[0]), int(self.time[-1]), zlib.crc32(last.tobytes())
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(getattr(self, f).nbytes for f in ("time",) + PRICE_FIELDS))
+
+
+__all__ = ["Candles", "PRICE_FIELDS"]
@@ -0,0 +1,290 @@
+# src/services/indicator_engine.py
+"""
+Incremental (streaming) indicators.
+
+IndicatorState keeps just enough per-symbol state — rolling windows with
+running sums, the last EMA value, the RSI gain/loss windows — to fold in one
+new bar in O(1). Fed the same bars, values match add_indicators(): SMA with
+min_periods=1, EMA(span, adjust=False) and the 14-bar simple-average RSI
+(50 when there are no losses in the window).
+
+IndicatorEngine manages one state per symbol/interval, appends only bars newer
+than what it has seen, and checkpoints state as JSON next to the symbol's
+series in the candle store, so a restart resumes without replaying history.
+The newest bar may still be forming, so it is only peeked at (not committed)
+until a later bar arrives.
+"""
+
+import json
+import os
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from src.config import CANDLE_BASE_PERIOD
+from src.services.candles import Candles
+from src.services.market_data import candle_store, get_stock_candle_arrays
+
+DEFAULT_SMA = (50, 200)
+DEFAULT_EMA = (20,)
+DEFAULT_RSI = 14
+
+
+class _Window:
+    """Fixed-size window with a running sum and a count of non-zero values."""
+
+    __slots__ = ("size", "values", "total", "nonzero", "_since_resum")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values: deque = deque(maxlen=size)
+        self.total = 0.0
+        self.nonzero = 0
+        self._since_resum = 0
+
+    def push(self, x: float) -> None:
+        if len(self.values) == self.size:
+            old = self.values[0]
+            self.total -= old
+            self.nonzero -= old != 0.0
+        self.values.append(x)
+        self.total += x
+        self.nonzero += x != 0.0
+
+        # re-sum once per window length so float drift never accumulates
+        self._since_resum += 1
+        if self._since_resum >= self.size:
+            self.total = float(sum(self.values))
+            self._since_resum = 0
+
+    def mean(self) -> float:
+        return self.total / len(self.values) if self.values else float("nan")
+
+    def peek(self, x: float) -> Tuple[float, int]:
+        """(mean, non-zero count) as if `x` were pushed, without pushing it."""
+        total, nonzero, n = self.total + x, self.nonzero + (x != 0.0), len(self.values) + 1
+        if len(self.values) == self.size:
+            old = self.values[0]
+            total, nonzero, n = total - old, nonzero - (old != 0.0), n - 1
+        return total / n, nonzero
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"size": self.size, "values": list(self.values)}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "_Window":
+        w = cls(int(d["size"]))
+        for x in d["values"]:
+            w.push(float(x))
+        return w
+
+
+class IndicatorState:
+    """Streaming SMA/EMA/RSI for one series."""
+
+    def __init__(self, sma: Iterable[int] = DEFAULT_SMA, ema: Iterable[int] = DEFAULT_EMA,
+                 rsi: int = DEFAULT_RSI):
+        self.sma = {int(n): _Window(int(n)) for n in sma}
+        self.ema: Dict[int, Optional[float]] = {int(n): None for n in ema}
+        self.rsi_period = int(rsi)
+        self.gains = _Window(self.rsi_period)
+        self.losses = _Window(self.rsi_period)
+        self.last_close: Optional[float] = None
+        self.last_ts: Optional[int] = None
+        self.bars = 0
+
+    def update(self, ts: int, close: float) -> Dict[str, float]:
+        """Fold in one bar (epoch-ns `ts`) and return the current values."""
+        close = float(close)
+        for w in self.sma.values():
+            w.push(close)
+        for span, prev in self.ema.items():
+            alpha = 2.0 / (span + 1.0)
+            self.ema[span] = close if prev is None else alpha * close + (1.0 - alpha) * prev
+        if self.last_close is not None:
+            delta = close - self.last_close
+            self.gains.push(max(delta, 0.0))
+            self.losses.push(max(-delta, 0.0))
+
+        self.last_close = close
+        self.last_ts = int(ts)
+        self.bars += 1
+        return self.values()
+
+    @staticmethod
+    def _rsi(up: float, down: float, down_nonzero: int) -> float:
+        if down_nonzero == 0:
+            return 50.0
+        return 100.0 - 100.0 / (1.0 + up / down)
+
+    def _pack(self, sma: Dict[int, float], ema: Dict[int, Optional[float]], rsi: float) -> Dict[str, float]:
+        out = {f"SMA{n}": v for n, v in sma.items()}
+        out.update({f"EMA{n}": (v if v is not None else float("nan")) for n, v in ema.items()})
+        out["RSI" if self.rsi_period == DEFAULT_RSI else f"RSI{self.rsi_period}"] = rsi
+        return out
+
+    def values(self) -> Dict[str, float]:
+        """Values as of the last committed bar."""
+        if self.losses.values:
+            rsi = self._rsi(self.gains.mean(), self.losses.mean(), self.losses.nonzero)
+        else:
+            rsi = 50.0
+        return self._pack({n: w.mean() for n, w in self.sma.items()}, dict(self.ema), rsi)
+
+    def peek(self, close: float) -> Dict[str, float]:
+        """Values as if `close` were the next bar, leaving the state untouched (O(1))."""
+        close = float(close)
+        sma = {n: w.peek(close)[0] for n, w in self.sma.items()}
+        ema = {
+            span: close if prev is None else (2.0 / (span + 1.0)) * close + (1.0 - 2.0 / (span + 1.0)) * prev
+            for span, prev in self.ema.items()
+        }
+        if self.last_close is None:
+            rsi = 50.0
+        else:
+            delta = close - self.last_close
+            up, _ = self.gains.peek(max(delta, 0.0))
+            down, down_nonzero = self.losses.peek(max(-delta, 0.0))
+            rsi = self._rsi(up, down, down_nonzero)
+        return self._pack(sma, ema, rsi)
+
+    # --------------------------------------------------
+    # Checkpointing
+    # --------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sma": {str(n): w.to_dict() for n, w in self.sma.items()},
+            "ema": {str(n): v for n, v in self.ema.items()},
+            "rsi_period": self.rsi_period,
+            "gains": self.gains.to_dict(),
+            "losses": self.losses.to_dict(),
+            "last_close": self.last_close,
+            "last_ts": self.last_ts,
+            "bars": self.bars,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "IndicatorState":
+        st = cls(sma=(), ema=(), rsi=int(d["rsi_period"]))
+        st.sma = {int(n): _Window.from_dict(w) for n, w in d["sma"].items()}
+        st.ema = {int(n): v for n, v in d["ema"].items()}
+        st.gains = _Window.from_dict(d["gains"])
+        st.losses = _Window.from_dict(d["losses"])
+        st.last_close = d["last_close"]
+        st.last_ts = d["last_ts"]
+        st.bars = int(d["bars"])
+        return st
+
+
+class IndicatorEngine:
+    """Per-symbol IndicatorStates with checkpoints alongside the candle store."""
+
+    STATE_NAME = "indicators"
+
+    def __init__(self, store=None):
+        """store: CandleStore for checkpoints (default: the active provider's store)."""
+        self.store = store
+        self._states: Dict[Tuple[str, str], IndicatorState] = {}
+        self._lock = Lock()
+
+    def _path(self, symbol: str, interval: str) -> Optional[str]:
+        store = self.store if self.store is not None else candle_store()
+        if store is None:
+            return None
+        return store.state_path(symbol, interval, self.STATE_NAME)
+
+    def state(self, symbol: str, interval: str = "1d") -> Optional[IndicatorState]:
+        with self._lock:
+            return self._states.get((symbol.upper(), interval))
+
+    def update(self, symbol: str, candles: Candles, interval: str = "1d") -> Dict[str, float]:
+        """
+        Fold in the bars of `candles` newer than the state's last bar and
+        return the values at the newest bar.
+
+        All but the newest bar are committed; the newest one is peeked at, so
+        an intraday update of a forming bar is picked up on the next call. A
+        fresh (or gapped) state is rebuilt from the whole series first.
+        """
+        key = (symbol.upper(), interval)
+        with self._lock:
+            st = self._states.get(key)
+            if st is None:
+                st = self.restore(symbol, interval)
+
+            times = candles.time
+            i = 0
+            if st is not None and st.last_ts is not None:
+                i = int(np.searchsorted(times, st.last_ts, side="right"))
+                # last seen bar must still be in the series, otherwise start over
+                if i == 0 or times[i - 1] != st.last_ts:
+                    st = None
+            if st is None:
+                st = IndicatorState()
+                i = 0
+
+            close = candles.close
+            n = len(times)
+            for j in range(i, n - 1):
+                st.update(int(times[j]), float(close[j]))
+            self._states[key] = st
+            if n and (st.last_ts is None or times[n - 1] > st.last_ts):
+                return st.peek(float(close[n - 1]))
+            return st.values()
+
+    def append_bar(self, symbol: str, ts: int, close: float, interval: str = "1d") -> Dict[str, float]:
+        """O(1) update with a single completed bar (live feeds)."""
+        key = (symbol.upper(), interval)
+        with self._lock:
+            st = self._states.get(key) or self.restore(symbol, interval) or IndicatorState()
+            if st.last_ts is None or int(ts) > st.last_ts:
+                st.update(ts, close)
+            self._states[key] = st
+            return st.values()
+
+    # --------------------------------------------------
+    # Checkpoints
+    # --------------------------------------------------
+
+    def checkpoint(self, symbol: str, interval: str = "1d") -> bool:
+        path = self._path(symbol, interval)
+        st = self.state(symbol, interval)
+        if path is None or st is None:
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(st.to_dict(), f)
+        os.replace(tmp, path)
+        return True
+
+    def restore(self, symbol: str, interval: str = "1d") -> Optional[IndicatorState]:
+        path = self._path(symbol, interval)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return IndicatorState.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+# Singleton instance
+engine = IndicatorEngine()
+
+
+def live_indicators(symbol: str, interval: str = "1d", checkpoint: bool = True) -> Dict[str, float]:
+    """Latest streaming values for `symbol`, folding in only bars not seen yet."""
+    candles = get_stock_candle_arrays(symbol, period=CANDLE_BASE_PERIOD, interval=interval)
+    if not len(candles):
+        return {}
+    values = engine.update(symbol, candles, interval)
+    if checkpoint:
+        engine.checkpoint(symbol, interval)
+    return values
+
+
+__all__ = ["IndicatorState", "IndicatorEngine", "engine", "live_indicators"]
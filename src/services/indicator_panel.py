@@ -0,0 +1,178 @@
+# src/services/indicator_panel.py
+"""
+Panel (bars × symbols) indicators in single NumPy passes.
+
+align_close() lines many series up on one time axis (NaN where a symbol has
+no bar); panel_sma / panel_ema / panel_rsi then work on the whole 2-D array
+at once: rolling means come from one cumulative sum, the EMA recursion runs
+once per bar across every column. Values match add_indicators() column for
+column (SMA/RSI with min_periods=1, EMA with adjust=False) on gap-free series.
+
+indicator_panel() is the one-call entry point for scanning a universe;
+sma_sweep() gives many SMA windows of one series for parameter searches.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from src.services.candles import Candles
+from src.services.indicators import DEFAULT_INDICATORS, parse_indicator
+from src.services.market_data import get_stock_candles_many
+
+
+# -------------------------------------------------------
+# Alignment
+# -------------------------------------------------------
+
+def align_close(candles: Mapping[str, Candles], field: str = "close") -> Tuple[np.ndarray, List[str], np.ndarray]:
+    """
+    (times, symbols, values) with values shaped (bars, symbols).
+
+    times is the sorted union of every series' epoch-ns timestamps; a symbol
+    without a bar at some time gets NaN there. Empty series are dropped.
+    """
+    series = {sym: c for sym, c in candles.items() if len(c)}
+    symbols = list(series)
+    if not symbols:
+        return np.empty(0, dtype=np.int64), [], np.empty((0, 0))
+
+    times = np.unique(np.concatenate([c.time for c in series.values()]))
+    out = np.full((len(times), len(symbols)), np.nan)
+    for j, c in enumerate(series.values()):
+        out[np.searchsorted(times, c.time), j] = getattr(c, field)
+    return times, symbols, out
+
+
+# -------------------------------------------------------
+# Kernels (axis 0 = bars)
+# -------------------------------------------------------
+
+def _rolling_sum_count(values: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Rolling sum and non-NaN count over the last `n` rows, from one cumsum each."""
+    valid = ~np.isnan(values)
+    zero_row = np.zeros((1,) + values.shape[1:])
+    csum = np.concatenate([zero_row, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    ccnt = np.concatenate([zero_row, np.cumsum(valid, axis=0, dtype=np.float64)])
+    lo = np.maximum(np.arange(1, len(values) + 1) - n, 0)
+    hi = np.arange(1, len(values) + 1)
+    return csum[hi] - csum[lo], ccnt[hi] - ccnt[lo]
+
+
+def panel_sma(values: np.ndarray, n: int, min_periods: int = 1) -> np.ndarray:
+    """
+    Rolling mean of the last `n` bars per column, NaNs skipped.
+
+    min_periods=1 matches the indicator columns; min_periods=n matches
+    close.rolling(n).mean() as the backtests use it.
+    """
+    total, count = _rolling_sum_count(np.asarray(values, dtype=np.float64), n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count >= max(min_periods, 1), total / np.maximum(count, 1), np.nan)
+
+
+def panel_ema(values: np.ndarray, span: int) -> np.ndarray:
+    """EMA(span, adjust=False) per column, seeded at each column's first value."""
+    values = np.asarray(values, dtype=np.float64)
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty_like(values)
+    prev = np.full(values.shape[1:], np.nan)
+    for i in range(len(values)):
+        x = values[i]
+        # missing bar: keep the previous value; no value yet: start from x
+        prev = np.where(np.isnan(x), prev, np.where(np.isnan(prev), x, alpha * x + (1.0 - alpha) * prev))
+        out[i] = prev
+    return out
+
+
+def panel_rsi(values: np.ndarray, n: int = 14) -> np.ndarray:
+    """Simple-average RSI per column (50 where the window has no losses)."""
+    values = np.asarray(values, dtype=np.float64)
+    delta = np.full_like(values, np.nan)
+    delta[1:] = values[1:] - values[:-1]
+    up = panel_sma(np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0)), n)
+    down = panel_sma(np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0)), n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + up / np.where(down == 0, np.nan, down))
+    return np.where(np.isnan(rsi), 50.0, rsi)
+
+
+_KERNELS = {
+    "sma": lambda v, n: {f"SMA{n}": panel_sma(v, n)},
+    "ema": lambda v, n: {f"EMA{n}": panel_ema(v, n)},
+    "rsi": lambda v, n: {("RSI" if n == 14 else f"RSI{n}"): panel_rsi(v, n)},
+}
+
+
+def compute_panel(values: np.ndarray, indicators: Iterable[str] = DEFAULT_INDICATORS) -> Dict[str, np.ndarray]:
+    """{column: (bars, symbols) array} for sma/ema/rsi specs on a close panel."""
+    out: Dict[str, np.ndarray] = {}
+    for spec in indicators:
+        ind, window = parse_indicator(spec)
+        kernel = _KERNELS.get(ind.name)
+        if kernel is None:
+            raise ValueError(f"Indicator not available in panel mode: {spec!r}")
+        out.update(kernel(values, window))
+    return out
+
+
+def sma_sweep(close: np.ndarray, windows: Iterable[int], min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    SMA of one close series for many windows: a (len(windows), bars) matrix.
+
+    Every row comes from the same prefix-sum array, so the cost is one
+    cumsum plus one subtraction per cell. min_periods=None matches
+    close.rolling(w).mean() (NaN until a full window); 1 matches the
+    min_periods=1 indicator columns.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    w = np.asarray(list(windows), dtype=np.int64)
+    if w.size and w.min() < 1:
+        raise ValueError("SMA windows must be >= 1")
+    n = len(close)
+    csum = np.concatenate([[0.0], np.cumsum(close)])
+    hi = np.arange(1, n + 1)
+    lo = np.maximum(hi[None, :] - w[:, None], 0)
+    count = hi[None, :] - lo
+    out = (csum[hi][None, :] - csum[lo]) / count
+    need = w[:, None] if min_periods is None else np.minimum(w[:, None], min_periods)
+    out[count < need] = np.nan
+    return out
+
+
+# -------------------------------------------------------
+# Universe scan
+# -------------------------------------------------------
+
+def indicator_panel(
+    symbols: Iterable[str],
+    period: str = "6mo",
+    interval: str = "1d",
+    indicators: Iterable[str] = DEFAULT_INDICATORS,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Indicators for a whole universe in one call.
+
+    Returns {"time": int64 epoch-ns (bars,), "symbols": [...], "close": (bars,
+    symbols), plus one (bars, symbols) array per indicator column}. Symbols
+    without data are left out of "symbols".
+    """
+    candles = get_stock_candles_many(symbols, period=period, interval=interval,
+                                     max_workers=max_workers, as_arrays=True)
+    times, syms, close = align_close(candles)
+    out: Dict[str, Any] = {"time": times, "symbols": syms, "close": close}
+    if syms:
+        out.update(compute_panel(close, indicators))
+    return out
+
+
+__all__ = [
+    "align_close",
+    "panel_sma",
+    "panel_ema",
+    "panel_rsi",
+    "compute_panel",
+    "sma_sweep",
+    "indicator_panel",
+]
@@ -1,56 +1,383 @@
 # src/services/indicators.py
-import pandas as pd
+"""
+Named, parameterised technical indicators computed on demand.
+
+Callers ask for exactly what they need with short specs — "sma20", "ema50",
+"rsi", "rsi7", "macd", "bb20", "atr", "volatility" — and only those columns
+are computed. A number after the name is the window; without one the
+indicator's default is used.
+
+Column names are upper case: SMA{n} / EMA{n} always carry the window, the
+others only when it differs from the default (RSI vs RSI7, ATR vs ATR21).
+
+indicator_arrays() memoizes results per (symbol, interval, specs, series
+fingerprint), so repeated requests within the same bar — candles, strategy
+and backtest alike — are served from memory. latest_indicators() returns
+just the last values, reading only each indicator's window.
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
 import numpy as np
-from typing import Dict, Any
-from src.services.market_data import get_stock_candles
+import pandas as pd
 
-def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    """Add only SMA50, SMA200, EMA20, RSI14."""
-    if df is None or df.empty:
-        return pd.DataFrame()
+from src.config import INDICATOR_CACHE_MAX
+from src.services.candles import Candles
+from src.services.market_data import get_stock_candle_arrays
+from src.utils.cache import TTLCache
+
+DEFAULT_INDICATORS = ("sma50", "sma200", "ema20", "rsi")
+
+_SPEC_RE = re.compile(r"^([a-z_]+?)_?(\d+)?$")
+
+
+class Indicator:
+    """One registry entry: compute(df, window) -> {column: Series}."""
+
+    __slots__ = ("name", "compute", "default", "group")
+
+    def __init__(self, name: str, compute: Callable, default: Optional[int], group: str):
+        self.name = name
+        self.compute = compute
+        self.default = default
+        self.group = group
+
+
+INDICATORS: Dict[str, Indicator] = {}
+_ALIASES: Dict[str, str] = {}
+
+
+def register_indicator(name: str, default: Optional[int] = None, group: str = "other",
+                       aliases: Iterable[str] = ()):
+    """Decorator adding an indicator to the registry."""
+    def wrap(fn: Callable) -> Callable:
+        INDICATORS[name] = Indicator(name, fn, default, group)
+        for a in aliases:
+            _ALIASES[a] = name
+        return fn
+    return wrap
+
+
+def parse_indicator(spec: str) -> Tuple[Indicator, Optional[int]]:
+    """'sma20' -> (SMA entry, 20); 'rsi' -> (RSI entry, 14)."""
+    m = _SPEC_RE.match(str(spec).strip().lower())
+    if m is None:
+        raise ValueError(f"Unknown indicator: {spec!r}")
+    name, window = m.group(1), m.group(2)
+    ind = INDICATORS.get(_ALIASES.get(name, name))
+    if ind is None:
+        raise ValueError(f"Unknown indicator: {spec!r}")
+    window = int(window) if window else ind.default
+    if ind.default is not None and (window is None or window < 1):
+        raise ValueError(f"Bad window for {ind.name}: {spec!r}")
+    return ind, window
 
-    df = df.copy()
-    df = df.sort_values("time")
 
-    close = df["close"].astype(float)
+def _suffix(ind: Indicator, window: Optional[int]) -> str:
+    return "" if window == ind.default else str(window)
 
-    df["SMA50"] = close.rolling(50, min_periods=1).mean()
-    df["SMA200"] = close.rolling(200, min_periods=1).mean()
-    df["EMA20"] = close.ewm(span=20, adjust=False).mean()
 
-    # RSI
-    delta = close.diff()
+# -------------------------------------------------------
+# Indicator definitions
+# -------------------------------------------------------
+
+@register_indicator("sma", default=20, group="sma", aliases=("ma",))
+def _sma(df: pd.DataFrame, n: int) -> Dict[str, pd.Series]:
+    return {f"SMA{n}": df["close"].rolling(n, min_periods=1).mean()}
+
+
+@register_indicator("ema", default=20, group="ema")
+def _ema(df: pd.DataFrame, n: int) -> Dict[str, pd.Series]:
+    return {f"EMA{n}": df["close"].ewm(span=n, adjust=False).mean()}
+
+
+@register_indicator("rsi", default=14, group="momentum")
+def _rsi(df: pd.DataFrame, n: int) -> Dict[str, pd.Series]:
+    delta = df["close"].diff()
     up = delta.clip(lower=0)
     down = -1 * delta.clip(upper=0)
-    roll_up = up.rolling(14, min_periods=1).mean()
-    roll_down = down.rolling(14, min_periods=1).mean()
+    roll_up = up.rolling(n, min_periods=1).mean()
+    roll_down = down.rolling(n, min_periods=1).mean()
     rs = roll_up / (roll_down.replace(0, np.nan))
-    df["RSI"] = (100 - (100 / (1 + rs))).fillna(50)
+    return {f"RSI{_suffix(INDICATORS['rsi'], n)}": (100 - (100 / (1 + rs))).fillna(50)}
+
+
+@register_indicator("macd", group="momentum")
+def _macd(df: pd.DataFrame, n: Optional[int]) -> Dict[str, pd.Series]:
+    close = df["close"]
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+    return {"MACD": macd, "MACD_SIGNAL": signal, "MACD_HIST": macd - signal}
+
+
+@register_indicator("bollinger", default=20, group="bands", aliases=("bb", "bbands"))
+def _bollinger(df: pd.DataFrame, n: int) -> Dict[str, pd.Series]:
+    roll = df["close"].rolling(n, min_periods=1)
+    mid, std = roll.mean(), roll.std()
+    p = f"BB{_suffix(INDICATORS['bollinger'], n)}"
+    return {f"{p}_MID": mid, f"{p}_UPPER": mid + 2 * std, f"{p}_LOWER": mid - 2 * std}
+
+
+@register_indicator("atr", default=14, group="volatility")
+def _atr(df: pd.DataFrame, n: int) -> Dict[str, pd.Series]:
+    prev_close = df["close"].shift(1)
+    tr = pd.concat(
+        [df["high"] - df["low"], (df["high"] - prev_close).abs(), (df["low"] - prev_close).abs()],
+        axis=1,
+    ).max(axis=1)
+    return {f"ATR{_suffix(INDICATORS['atr'], n)}": tr.rolling(n, min_periods=1).mean()}
+
+
+@register_indicator("volatility", default=20, group="volatility", aliases=("vol",))
+def _volatility(df: pd.DataFrame, n: int) -> Dict[str, pd.Series]:
+    """Rolling standard deviation of bar returns, in percent."""
+    ret = df["close"].pct_change()
+    return {f"VOLATILITY{_suffix(INDICATORS['volatility'], n)}": ret.rolling(n, min_periods=2).std() * 100}
+
+
+# -------------------------------------------------------
+# Public API
+# -------------------------------------------------------
+
+def _frame(df: Union[pd.DataFrame, Candles]) -> pd.DataFrame:
+    if isinstance(df, Candles):
+        if not len(df):
+            return pd.DataFrame()
+        # to_frame() already builds a fresh, time-ordered frame — no extra copy
+        return df.to_frame()
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df.copy()
+    return df.sort_values("time")
+
+
+def _compute(df: pd.DataFrame, indicators: Iterable[str]) -> Dict[str, Dict[str, pd.Series]]:
+    parsed = {}
+    for spec in indicators:
+        ind, window = parse_indicator(spec)
+        parsed[(ind.name, window)] = ind    # duplicates computed once
+    if not parsed:
+        return {}
+
+    base = df[["close"]].astype(float)
+    for col in ("high", "low"):
+        if col in df:
+            base[col] = df[col].astype(float)
+    out: Dict[str, Dict[str, pd.Series]] = {}
+    for (_, window), ind in parsed.items():
+        out.setdefault(ind.group, {}).update(ind.compute(base, window))
+    return out
 
+
+def compute_indicators(df: Union[pd.DataFrame, Candles],
+                       indicators: Iterable[str]) -> Dict[str, Dict[str, pd.Series]]:
+    """Requested indicators only, grouped: {"sma": {"SMA20": ...}, "momentum": {...}}."""
+    df = _frame(df)
+    if df.empty:
+        return {}
+    return _compute(df, indicators)
+
+
+def add_indicators(df: Union[pd.DataFrame, Candles],
+                   indicators: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Return a copy of `df` with the requested indicator columns added.
+
+    indicators: specs such as ["sma20", "rsi", "macd"]; None means the
+    classic SMA50/SMA200/EMA20/RSI set. Nothing else is computed.
+    """
+    df = _frame(df)
+    if df.empty:
+        return df
+
+    specs = DEFAULT_INDICATORS if indicators is None else indicators
+    for columns in _compute(df, specs).values():
+        for col, values in columns.items():
+            df[col] = values
     return df
 
+# -------------------------------------------------------
+# Memoized results
+# -------------------------------------------------------
+
+# entries never expire: a new or changed bar changes the key
+_results = TTLCache(ttl=None, maxsize=INDICATOR_CACHE_MAX)
+
+
+def _spec_key(indicators: Iterable[str]) -> Tuple[Tuple[str, Optional[int]], ...]:
+    return tuple(sorted({
+        (ind.name, window) for ind, window in map(parse_indicator, indicators)
+    }, key=lambda k: (k[0], k[1] or 0)))
+
+
+def indicator_arrays(symbol: str, candles: Candles, indicators: Optional[Iterable[str]] = None,
+                     interval: str = "1d") -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    compute_indicators() as read-only float64 arrays, memoized.
+
+    The key is (symbol, interval, normalized specs, series fingerprint), so
+    the same request on the same bars is computed once; the arrays are shared
+    between callers and must not be modified.
+    """
+    if not len(candles):
+        return {}
+    specs = _spec_key(DEFAULT_INDICATORS if indicators is None else indicators)
+    key = (symbol.upper(), interval, specs, candles.fingerprint())
+
+    def load():
+        out = {}
+        wanted = [f"{name}{window or ''}" for name, window in specs]
+        for group, columns in compute_indicators(candles, wanted).items():
+            out[group] = {}
+            for col, values in columns.items():
+                arr = values.to_numpy(dtype=np.float64)
+                arr.setflags(write=False)
+                out[group][col] = arr
+        return out
+
+    return {g: dict(cols) for g, cols in _results.get_or_load(key, load).items()}
+
+
+def rsi_array(symbol: str, candles: Candles, n: int = 14, interval: str = "1d") -> np.ndarray:
+    """Memoized RSI(n) of `candles` from the registry (read-only array)."""
+    ind, window = parse_indicator(f"rsi{int(n)}")
+    columns = indicator_arrays(symbol, candles, [f"rsi{window}"], interval=interval)
+    return columns["momentum"][f"RSI{_suffix(ind, window)}"]
+
+
+def indicator_cache_stats() -> Dict[str, Any]:
+    return _results.stats()
+
+
+# -------------------------------------------------------
+# Latest values only
+# -------------------------------------------------------
+
+# (SYMBOL, interval, span, first bar ts) -> (ts, EMA) at the last committed bar
+_ema_seeds = TTLCache(ttl=None, maxsize=INDICATOR_CACHE_MAX * 4)
+
+
+def _tail_sma(symbol, interval, candles: Candles, n: int) -> Dict[str, float]:
+    return {f"SMA{n}": float(np.mean(candles.close[-n:], dtype=np.float64))}
+
+
+def _tail_rsi(symbol, interval, candles: Candles, n: int) -> Dict[str, float]:
+    delta = np.diff(np.asarray(candles.close[-(n + 1):], dtype=np.float64))
+    col = f"RSI{_suffix(INDICATORS['rsi'], n)}"
+    if not len(delta):
+        return {col: 50.0}
+    down = np.maximum(-delta, 0.0).mean()
+    if down == 0:
+        return {col: 50.0}
+    up = np.maximum(delta, 0.0).mean()
+    return {col: float(100 - 100 / (1 + up / down))}
+
+
+def _tail_volatility(symbol, interval, candles: Candles, n: int) -> Dict[str, float]:
+    close = np.asarray(candles.close[-(n + 1):], dtype=np.float64)
+    ret = close[1:] / close[:-1] - 1.0
+    value = float(np.std(ret, ddof=1) * 100) if len(ret) >= 2 else float("nan")
+    return {f"VOLATILITY{_suffix(INDICATORS['volatility'], n)}": value}
+
+
+def _tail_ema(symbol, interval, candles: Candles, span: int) -> Dict[str, float]:
+    """
+    EMA at the last bar, resuming from a cached value at an earlier bar.
+
+    Only bars after the cached one are folded in, so repeated calls cost
+    O(new bars). The newest bar may still be forming and is not cached.
+    """
+    times = candles.time
+    close = candles.close
+    n = len(times)
+    alpha = 2.0 / (span + 1.0)
+    key = (symbol.upper(), interval, span, int(times[0]))
+
+    i, ema = 0, None
+    seed = _ema_seeds.get(key)
+    if seed is not None:
+        j = int(np.searchsorted(times, seed[0], side="right"))
+        if j > 0 and times[j - 1] == seed[0]:
+            i, ema = j, seed[1]
+
+    for k in range(i, n - 1):
+        ema = float(close[k]) if ema is None else alpha * float(close[k]) + (1.0 - alpha) * ema
+    if n > 1:
+        _ema_seeds.set(key, (int(times[n - 2]), ema))
+    last = float(close[n - 1])
+    return {f"EMA{span}": last if ema is None else alpha * last + (1.0 - alpha) * ema}
+
+
+_TAILS = {
+    "sma": _tail_sma,
+    "ema": _tail_ema,
+    "rsi": _tail_rsi,
+    "volatility": _tail_volatility,
+}
+
+
+def latest_indicators(symbol: str, candles: Optional[Candles] = None,
+                      indicators: Optional[Iterable[str]] = None,
+                      period: str = "6mo", interval: str = "1d") -> Dict[str, float]:
+    """
+    {column: value at the last bar} without building full series.
+
+    SMA / RSI / volatility read only their window; EMA resumes from a cached
+    seed. Other indicators fall back to indicator_arrays(). Values equal the
+    last row of add_indicators() on the same bars.
+    """
+    if candles is None:
+        candles = get_stock_candle_arrays(symbol, period=period, interval=interval)
+    if not len(candles):
+        return {}
+
+    out: Dict[str, float] = {}
+    rest = []
+    for spec in (DEFAULT_INDICATORS if indicators is None else indicators):
+        ind, window = parse_indicator(spec)
+        fn = _TAILS.get(ind.name)
+        if fn is None:
+            rest.append(spec)
+        else:
+            out.update(fn(symbol, interval, candles, window))
+    if rest:
+        for columns in indicator_arrays(symbol, candles, rest, interval).values():
+            out.update({col: float(values[-1]) for col, values in columns.items()})
+    return out
+
+
 def get_indicators(symbol: str, period="6mo") -> Dict[str, Any]:
     """Return indicator summary for agents."""
-    df = get_stock_candles(symbol, period)
-    if df.empty:
+    last = latest_indicators(symbol, period=period)
+    if not last:
         return {"error": "no data"}
 
-    df = add_indicators(df)
-    last = df.iloc[-1]
-
     return {
         "symbol": symbol.upper(),
         "period": period,
         "sma": {
-            "sma50": float(last["SMA50"]),
-            "sma200": float(last["SMA200"]),
+            "sma50": last["SMA50"],
+            "sma200": last["SMA200"],
         },
         "ema": {
-            "ema20": float(last["EMA20"]),
+            "ema20": last["EMA20"],
         },
         "momentum": {
-            "rsi": float(last["RSI"]),
+            "rsi": last["RSI"],
         }
     }
 
-__all__ = ["add_indicators", "get_indicators"]
+__all__ = [
+    "INDICATORS",
+    "DEFAULT_INDICATORS",
+    "register_indicator",
+    "parse_indicator",
+    "compute_indicators",
+    "add_indicators",
+    "indicator_arrays",
+    "rsi_array",
+    "latest_indicators",
+    "indicator_cache_stats",
+    "get_indicators",
+]
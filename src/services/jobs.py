@@ -0,0 +1,246 @@
+# src/services/jobs.py
+"""
+Background backtest jobs.
+
+submit() records a job in SQLite (backtest_jobs), queues it on a bounded
+thread pool and returns its id at once, so a long backtest no longer holds
+the /api/handle request open. The job function gets a progress callback:
+progress(fraction, partial) updates the live status (and, throttled, the
+stored row) and raises JobCancelled once cancel() was called, so the run
+stops at its next checkpoint. status() answers from memory while a job is
+live and from SQLite afterwards — also after a restart.
+
+Job states: queued → running → done | failed | cancelled.
+"""
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.config import BACKTEST_JOB_KEEP, BACKTEST_JOB_QUEUE_MAX, BACKTEST_JOB_WORKERS
+from src.database.backtest_jobs import (
+    create_job, get_job, interrupt_unfinished, list_jobs, prune_jobs, update_job,
+)
+from src.utils.json_safe import json_safe
+from src.utils.logger import log_error, log_event
+
+# live progress is always current in memory; the stored row at most this often
+_SAVE_EVERY_SEC = 1.0
+
+FINAL_STATES = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback after the job was cancelled."""
+
+
+def _dumps(obj: Any) -> Optional[str]:
+    return None if obj is None else json.dumps(json_safe(obj), default=str)
+
+
+def _loads(text: Optional[str]) -> Any:
+    return None if text is None else json.loads(text)
+
+
+class _Job:
+    __slots__ = ("job_id", "session_id", "kind", "status", "progress", "partial",
+                 "created_at", "started_at", "cancel", "future", "saved_at", "result", "error")
+
+    def __init__(self, job_id: str, session_id: Optional[str], kind: str):
+        self.job_id = job_id
+        self.session_id = session_id
+        self.kind = kind
+        self.status = "queued"
+        self.progress = 0.0
+        self.partial: Any = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.cancel = threading.Event()
+        self.future: Optional[Future] = None
+        self.saved_at = 0.0
+        self.result: Any = None
+        self.error: Optional[str] = None
+
+    def view(self) -> Dict[str, Any]:
+        view = {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": "cancelling" if self.cancel.is_set() and self.status == "running" else self.status,
+            "progress": round(self.progress, 4),
+            "partial": self.partial,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+        }
+        # a finished job is briefly still live: report it complete, with its result
+        if self.status in FINAL_STATES:
+            view.update(result=self.result, error=self.error)
+        return view
+
+
+class JobManager:
+    def __init__(self, workers: int = BACKTEST_JOB_WORKERS, queue_max: int = BACKTEST_JOB_QUEUE_MAX,
+                 keep: int = BACKTEST_JOB_KEEP):
+        self.workers = max(1, workers)
+        self.queue_max = queue_max
+        self.keep = keep
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._live: Dict[str, _Job] = {}
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"submitted": 0, "done": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+
+    def _executor(self) -> ThreadPoolExecutor:
+        # created on first use; rows a previous process left unfinished are closed then
+        if self._pool is None:
+            try:
+                interrupt_unfinished(time.time())
+            except Exception as e:
+                log_error(None, "backtest job recovery failed", e)
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="backtest-job")
+        return self._pool
+
+    # --------------------------------------------------
+    # Public API
+    # --------------------------------------------------
+
+    def submit(self, kind: str, fn: Callable[[Callable], Dict[str, Any]],
+               request: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue fn(progress) and return the job's status. fn returns the
+        result dict (an "error" key marks the job failed).
+        """
+        with self._lock:
+            pool = self._executor()
+            if len(self._live) >= self.queue_max:
+                self.stats["rejected"] += 1
+                return {"error": f"Too many backtest jobs in progress ({self.queue_max}); try again later"}
+            job = _Job(uuid.uuid4().hex, session_id, kind)
+            create_job(job.job_id, session_id, kind, _dumps(request), job.created_at)
+            self._live[job.job_id] = job
+            self.stats["submitted"] += 1
+            job.future = pool.submit(self._run, job, fn)
+        log_event(None, "backtest_job.submit", details={"job_id": job.job_id, "kind": kind})
+        return job.view()
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Live view of a running / queued job, or the stored one (with its result)."""
+        job = self._live.get(job_id)
+        if job is not None:
+            return job.view()
+        row = get_job(job_id)
+        if row is None:
+            return None
+        return {
+            "job_id": row["job_id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "partial": _loads(row["partial"]),
+            "result": _loads(row["result"]),
+            "error": row["error"],
+            "request": _loads(row["request"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+        }
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Ask a job to stop. Queued jobs are dropped at once; running ones stop at their next checkpoint."""
+        job = self._live.get(job_id)
+        if job is None:
+            return self.status(job_id)
+        job.cancel.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, "cancelled")
+        return self.status(job_id)
+
+    def list(self, session_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = list_jobs(session_id, limit)
+        for row in rows:
+            live = self._live.get(row["job_id"])
+            if live is not None:
+                row.update(status=live.view()["status"], progress=round(live.progress, 4))
+        return rows
+
+    def shutdown(self) -> None:
+        """Cancel everything live and stop the pool (running jobs stop at their next checkpoint)."""
+        for job in list(self._live.values()):
+            self.cancel(job.job_id)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def job_stats(self) -> Dict[str, Any]:
+        live = list(self._live.values())
+        return {
+            **self.stats,
+            "running": sum(j.status == "running" for j in live),
+            "queued": sum(j.status == "queued" for j in live),
+            "workers": self.workers,
+        }
+
+    # --------------------------------------------------
+    # Worker side
+    # --------------------------------------------------
+
+    def _run(self, job: _Job, fn: Callable[[Callable], Dict[str, Any]]) -> None:
+        if job.cancel.is_set():
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.started_at = time.time()
+
+        try:
+            update_job(job.job_id, status="running", started_at=job.started_at)
+            result = fn(lambda fraction, partial=None: self._progress(job, fraction, partial))
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            log_error(None, f"backtest job {job.job_id} failed", e)
+            self._finish(job, "failed", error=str(e))
+        else:
+            if isinstance(result, dict) and "error" in result:
+                self._finish(job, "failed", result=result, error=str(result["error"]))
+            else:
+                job.progress = 1.0
+                self._finish(job, "done", result=result)
+
+    def _progress(self, job: _Job, fraction: float, partial: Any = None) -> None:
+        if job.cancel.is_set():
+            raise JobCancelled(job.job_id)
+        job.progress = min(1.0, max(job.progress, float(fraction)))
+        if partial is not None:
+            job.partial = json_safe(partial)
+        now = time.time()
+        if now - job.saved_at >= _SAVE_EVERY_SEC:
+            job.saved_at = now
+            try:
+                update_job(job.job_id, progress=job.progress, partial=_dumps(job.partial))
+            except Exception as e:
+                # e.g. "database is locked": the live view is current, the next save catches up
+                log_error(None, f"saving progress of backtest job {job.job_id} failed", e)
+
+    def _finish(self, job: _Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        # stored row first, terminal status last: a poll never sees "done" without the result
+        job.result = json_safe(result)
+        job.error = error
+        try:
+            update_job(job.job_id, status=status, progress=job.progress, partial=_dumps(job.partial),
+                       result=_dumps(job.result), error=error, finished_at=time.time())
+            prune_jobs(self.keep)
+        except Exception as e:
+            log_error(None, f"saving backtest job {job.job_id} failed", e)
+        with self._lock:
+            job.status = status
+            self._live.pop(job.job_id, None)
+            self.stats[status] += 1
+        log_event(None, "backtest_job.finish", details={"job_id": job.job_id, "status": status})
+
+
+# Singleton instance
+jobs = JobManager()
+
+
+__all__ = ["JobCancelled", "JobManager", "jobs", "FINAL_STATES"]
@@ -0,0 +1,203 @@
+# src/services/market_calendar.py
+"""
+US equity trading calendar (NYSE regular sessions) and cache expiry rules.
+
+Bars and quotes can only change while a session is open (plus a short
+settle window after the close while the final prints land). Outside that,
+anything fetched after the last close is final, so caches can keep it until
+the next open. Crypto (SYMBOL-USD) trades 24/7 and always uses plain TTLs.
+"""
+
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from src.config import QUOTE_CACHE_TTL_SEC, CRYPTO_QUOTE_TTL_SEC, MARKET_SETTLE_SEC
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+REGULAR_OPEN = dtime(9, 30)
+REGULAR_CLOSE = dtime(16, 0)
+EARLY_CLOSE = dtime(13, 0)
+
+
+# -------------------------------------------------------
+# Holidays
+# -------------------------------------------------------
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based) weekday of a month; n=-1 for the last one."""
+    if n > 0:
+        d = date(year, month, 1)
+        d += timedelta(days=(weekday - d.weekday()) % 7)
+        return d + timedelta(weeks=n - 1)
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    d = nxt - timedelta(days=1)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+
+def _observed(d: date) -> date:
+    """Saturday holidays move to Friday, Sunday holidays to Monday."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=32)
+def holidays(year: int) -> Dict[date, str]:
+    out = {
+        _nth_weekday(year, 1, 0, 3): "Martin Luther King Jr. Day",
+        _nth_weekday(year, 2, 0, 3): "Washington's Birthday",
+        _easter(year) - timedelta(days=2): "Good Friday",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        _nth_weekday(year, 11, 3, 4): "Thanksgiving Day",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    # New Year's on a Saturday is not observed on the prior Friday
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        out[_observed(new_year)] = "New Year's Day"
+    if year >= 2022:
+        out[_observed(date(year, 6, 19))] = "Juneteenth"
+    return out
+
+
+def is_trading_day(d: date) -> bool:
+    return d.weekday() < 5 and d not in holidays(d.year)
+
+
+def _close_time(d: date) -> dtime:
+    early = {
+        date(d.year, 7, 3),
+        _nth_weekday(d.year, 11, 3, 4) + timedelta(days=1),   # day after Thanksgiving
+        date(d.year, 12, 24),
+    }
+    return EARLY_CLOSE if d in early else REGULAR_CLOSE
+
+
+# -------------------------------------------------------
+# Sessions
+# -------------------------------------------------------
+
+def _now(now: Optional[datetime]) -> datetime:
+    if now is None:
+        return datetime.now(EXCHANGE_TZ)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=EXCHANGE_TZ)
+    return now.astimezone(EXCHANGE_TZ)
+
+
+def session_bounds(d: date) -> Optional[Tuple[datetime, datetime]]:
+    """(open, close) of the regular session on `d`, or None if closed all day."""
+    if not is_trading_day(d):
+        return None
+    return (
+        datetime.combine(d, REGULAR_OPEN, EXCHANGE_TZ),
+        datetime.combine(d, _close_time(d), EXCHANGE_TZ),
+    )
+
+
+def is_open(now: Optional[datetime] = None) -> bool:
+    now = _now(now)
+    bounds = session_bounds(now.date())
+    return bounds is not None and bounds[0] <= now < bounds[1]
+
+
+def last_close(now: Optional[datetime] = None) -> datetime:
+    """Most recent session close at or before `now`."""
+    now = _now(now)
+    d = now.date()
+    for _ in range(15):
+        bounds = session_bounds(d)
+        if bounds is not None and bounds[1] <= now:
+            return bounds[1]
+        d -= timedelta(days=1)
+    return datetime.combine(d, REGULAR_CLOSE, EXCHANGE_TZ)
+
+
+def next_open(now: Optional[datetime] = None) -> datetime:
+    """Next session open strictly after `now`."""
+    now = _now(now)
+    d = now.date()
+    for _ in range(15):
+        bounds = session_bounds(d)
+        if bounds is not None and bounds[0] > now:
+            return bounds[0]
+        d += timedelta(days=1)
+    return datetime.combine(d, REGULAR_OPEN, EXCHANGE_TZ)
+
+
+def is_live(now: Optional[datetime] = None) -> bool:
+    """True while prices can still move: session open or just closed (settling)."""
+    now = _now(now)
+    return is_open(now) or now < last_close(now) + timedelta(seconds=MARKET_SETTLE_SEC)
+
+
+# -------------------------------------------------------
+# Cache expiry rules
+# -------------------------------------------------------
+
+def is_crypto(ticker: str) -> bool:
+    """Provider tickers on the crypto fallback path look like BTC-USD."""
+    return ticker.upper().endswith("-USD")
+
+
+def quote_ttl(crypto: bool = False, now: Optional[datetime] = None) -> float:
+    """Seconds a quote may be cached."""
+    if crypto:
+        return CRYPTO_QUOTE_TTL_SEC
+    now = _now(now)
+    if is_live(now):
+        return QUOTE_CACHE_TTL_SEC
+    # closed: the price cannot change before the next open
+    return max(QUOTE_CACHE_TTL_SEC, (next_open(now) - now).total_seconds())
+
+
+def is_current(fetched_at: float, ttl: float, crypto: bool = False,
+               now: Optional[datetime] = None) -> bool:
+    """
+    True if data fetched at `fetched_at` (epoch seconds) cannot be stale.
+
+    While the market is live this is a plain `ttl` check; once it has closed
+    and settled, anything fetched after the settle point stays current until
+    the next open.
+    """
+    now = _now(now)
+    age = now.timestamp() - fetched_at
+    if crypto or is_live(now):
+        return age <= ttl
+    settled = last_close(now) + timedelta(seconds=MARKET_SETTLE_SEC)
+    return fetched_at >= settled.timestamp()
+
+
+__all__ = [
+    "holidays",
+    "is_trading_day",
+    "session_bounds",
+    "is_open",
+    "is_live",
+    "last_close",
+    "next_open",
+    "is_crypto",
+    "quote_ttl",
+    "is_current",
+]
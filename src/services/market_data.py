@@ -1,49 +1,362 @@
 # src/services/market_data.py
-import yfinance as yf
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from typing import Dict, Any
+from threading import Lock
+from typing import Dict, Any, Iterable, Optional, Union
 
-def get_stock_price(symbol: str) -> Dict[str, Any]:
-    """Get latest stock price using yfinance."""
+from src.config import (
+    CANDLE_STORE_ENABLED, CANDLE_STORE_DIR, CANDLE_REFRESH_SEC,
+    QUOTE_CACHE_TTL_SEC, QUOTE_CACHE_MAX, CANDLE_FETCH_WORKERS,
+    CANDLE_BASE_PERIOD, CANDLE_MEMORY_MAX, CANDLE_FLOAT32,
+    QUOTE_STALE_SEC, CANDLE_STALE_SEC,
+)
+from src.services.candle_store import CandleStore, COLUMNS
+from src.services.candles import Candles
+from src.services.market_calendar import is_crypto, is_current, quote_ttl
+from src.services.providers import get_provider, is_known_period, period_start
+from src.utils.cache import TTLCache
+
+# one store per provider, so replayed/synthetic bars never mix with live ones
+_stores: Dict[str, CandleStore] = {}
+_stores_lock = Lock()
+
+# errors are never cached, so a failed lookup is retried on the next call
+_quotes = TTLCache(
+    ttl=QUOTE_CACHE_TTL_SEC,
+    maxsize=QUOTE_CACHE_MAX,
+    cache_if=lambda q: "error" not in q,
+    stale_ttl=QUOTE_STALE_SEC,
+)
+
+# decoded long series per (store, symbol, interval); shorter periods are views into these
+_series = TTLCache(ttl=None, maxsize=CANDLE_MEMORY_MAX)
+
+# background candle top-ups (stale-while-revalidate)
+_refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="candle-refresh")
+_refreshing: set = set()
+_refreshing_lock = Lock()
+
+
+def _get_store() -> Optional[CandleStore]:
+    if not CANDLE_STORE_ENABLED:
+        return None
+    name = get_provider().name
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = CandleStore(os.path.join(CANDLE_STORE_DIR, name))
+        return _stores[name]
+
+
+def candle_store() -> Optional[CandleStore]:
+    """Candle store for the active provider (None when disabled)."""
+    return _get_store()
+
+
+# -------------------------------------------------------
+# Quotes
+# -------------------------------------------------------
+
+def _fetch_price(ticker_symbol: str, symbol: str) -> Dict[str, Any]:
     try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period="1d")
-        if data.empty:
+        price = get_provider().latest_price(ticker_symbol)
+        if price is None:
             return {"error": f"No price data for {symbol}"}
-        return {"price": float(data["Close"].iloc[-1])}
+        return {"price": float(price)}
     except Exception as e:
         return {"error": str(e)}
 
+def get_stock_price(symbol: str) -> Dict[str, Any]:
+    """Get latest stock price (cached until it could have changed)."""
+    key = (get_provider().name, "stock", symbol.upper())
+    ttl = quote_ttl(crypto=is_crypto(symbol))
+    return dict(_quotes.get_or_load(key, lambda: _fetch_price(symbol, symbol), ttl=ttl))
+
 def get_crypto_price(symbol: str) -> Dict[str, Any]:
     """Crypto fallback: SYMBOL-USD."""
+    key = (get_provider().name, "crypto", symbol.upper())
+    ttl = quote_ttl(crypto=True)
+    return dict(_quotes.get_or_load(key, lambda: _fetch_price(symbol + "-USD", symbol), ttl=ttl))
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit/miss/coalesced counters for the market-data caches."""
+    candles = _series.stats()
+    candles["bytes"] = sum(c.nbytes for _, c in _series.values())
+    return {"quotes": _quotes.stats(), "candles": candles}
+
+
+# -------------------------------------------------------
+# Candles
+# -------------------------------------------------------
+
+def _fetch_candles(symbol: str, interval: str = "1d", period: Optional[str] = None,
+                   start: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    return get_provider().history(symbol, period=period, start=start, interval=interval)
+
+
+def _slice_period(candles: Candles, period: str) -> Candles:
+    """Tail of `candles` covering `period` — array views, the bars are not copied."""
+    if not len(candles) or period == "max":
+        return candles
+    return candles.since(period_start(period, pd.Timestamp.now(tz=candles.tz or None)))
+
+
+def _download_period(period: str) -> str:
+    """Window to download for `period`: at least CANDLE_BASE_PERIOD."""
+    if not is_known_period(CANDLE_BASE_PERIOD) or period == "max":
+        return period
+    now = pd.Timestamp.now(tz="UTC")
+    base = period_start(CANDLE_BASE_PERIOD, now)
+    wanted = period_start(period, now)
+    if base is None or base < wanted:
+        return CANDLE_BASE_PERIOD
+    return period
+
+
+def _covers(meta: Dict[str, Any], period: str) -> bool:
+    """True if the stored window reaches back at least as far as `period`."""
+    covers_from = meta.get("covers_from")
+    if meta.get("covers_from_max"):
+        return True
+    if covers_from is None:
+        return False
+    start = period_start(period, pd.Timestamp.now(tz="UTC"))
+    if start is None:
+        return False    # "max" is only covered by a max download
+    return pd.Timestamp(covers_from, unit="s", tz="UTC") <= start
+
+
+def _is_fresh(meta: Optional[Dict[str, Any]], period: str, symbol: str) -> bool:
+    """True if the stored series can answer `period` without any network call."""
+    return (
+        bool(meta)
+        and _covers(meta, period)
+        and is_current(meta.get("fetched_at", 0), CANDLE_REFRESH_SEC, crypto=is_crypto(symbol))
+    )
+
+
+def _load_series(store: CandleStore, symbol: str, interval: str) -> Optional[Candles]:
+    """Full stored series, decoded once and reused until the store changes."""
+    meta = store.meta(symbol, interval)
+    if not meta:
+        return None
+    key = (store.root, symbol.upper(), interval)
+    version = (meta.get("last_ts"), meta.get("fetched_at"), meta.get("rows"))
+    hit = _series.get(key)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    candles = store.load_candles(symbol, interval, float32=CANDLE_FLOAT32)
+    if candles is not None:
+        _series.set(key, (version, candles))
+    return candles
+
+
+def _download(store: CandleStore, symbol: str, period: str, interval: str) -> pd.DataFrame:
+    """Download the window for `period` (at least the base window) and replace the stored series."""
+    fetch_period = _download_period(period)
+    df = _fetch_candles(symbol, interval=interval, period=fetch_period)
+    if df.empty:
+        return df
+    start = period_start(fetch_period, pd.Timestamp.now(tz="UTC"))
+    store.write(
+        symbol, interval, df,
+        fetched_at=time.time(),
+        covers_from=start.timestamp() if start is not None else None,
+        covers_from_max=start is None,
+    )
+    return df
+
+
+def _append_since(store: CandleStore, symbol: str, interval: str, last: pd.Timestamp) -> None:
+    """Fetch bars from `last` (the last stored bar) onward and merge them into the store."""
+    fresh = _fetch_candles(symbol, interval=interval, start=last)
+    store.append(symbol, interval, fresh, fetched_at=time.time())
+
+
+def _top_up(store: CandleStore, symbol: str, interval: str, stored: Candles) -> Optional[Candles]:
+    _append_since(store, symbol, interval, stored.last_time())
+    return _load_series(store, symbol, interval)
+
+
+def _top_up_async(store: CandleStore, symbol: str, interval: str, stored: Candles) -> None:
+    key = (store.root, symbol.upper(), interval)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            _top_up(store, symbol, interval, stored)
+        except Exception:
+            pass
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    _refresh_pool.submit(run)
+
+
+def _cached_candles(store: CandleStore, symbol: str, period: str, interval: str,
+                    background: bool = True) -> Candles:
+    meta = store.meta(symbol, interval)
+
+    # 1) Nothing (or too short a window) stored → download the long base window once
+    if not meta or not _covers(meta, period):
+        df = _download(store, symbol, period, interval)
+        if df.empty:
+            return Candles.empty()
+        stored = _load_series(store, symbol, interval)
+        if stored is None:
+            stored = Candles.from_frame(df, float32=CANDLE_FLOAT32)
+        return _slice_period(stored, period)
+
+    # 2) Stored and recent enough → serve from memory / disk
+    stored = _load_series(store, symbol, interval)
+    if stored is None or not len(stored):
+        return Candles.from_frame(_fetch_candles(symbol, interval=interval, period=period), float32=CANDLE_FLOAT32)
+
+    # 3) Stale → fetch only bars from the last stored bar onward and merge.
+    #    Within the stale window the stored bars are served right away and the
+    #    top-up runs in the background.
+    if not _is_fresh(meta, period, symbol):
+        age = time.time() - meta.get("fetched_at", 0)
+        if background and age <= CANDLE_REFRESH_SEC + CANDLE_STALE_SEC:
+            _top_up_async(store, symbol, interval, stored)
+        else:
+            try:
+                stored = _top_up(store, symbol, interval, stored) or stored
+            except Exception:
+                pass  # upstream hiccup: stored bars are still better than nothing
+
+    return _slice_period(stored, period)
+
+
+def load_candle_arrays(symbol: str, period="6mo", interval: str = "1d") -> Candles:
+    """
+    Like get_stock_candle_arrays(), but upstream errors propagate, so a
+    failed fetch can be told apart from a symbol that has no data.
+    """
+    store = _get_store()
+    if store is not None and is_known_period(period):
+        return _cached_candles(store, symbol, period, interval)
+    return Candles.from_frame(_fetch_candles(symbol, interval=interval, period=period), float32=CANDLE_FLOAT32)
+
+
+def get_stock_candle_arrays(symbol: str, period="6mo", interval: str = "1d") -> Candles:
+    """OHLCV as compact Candles arrays (empty on failure)."""
     try:
-        ticker = yf.Ticker(symbol + "-USD")
-        data = ticker.history(period="1d")
-        if data.empty:
-            return {"error": f"No price data for {symbol}"}
-        return {"price": float(data["Close"].iloc[-1])}
-    except Exception as e:
-        return {"error": str(e)}
+        return load_candle_arrays(symbol, period=period, interval=interval)
+    except Exception:
+        return Candles.empty()
+
+
+def warm_symbol(symbol: str, refresh_within: float = 0.0) -> None:
+    """
+    Refresh a symbol's quote and stored daily bars synchronously if they are
+    due (or due within `refresh_within` seconds). Used by the watchlist
+    refresher so request paths find them already fresh.
+    """
+    key = (get_provider().name, "stock", symbol.upper())
+    left = _quotes.ttl_remaining(key)
+    if left is None or left <= refresh_within:
+        ttl = quote_ttl(crypto=is_crypto(symbol))
+        _quotes.refresh(key, lambda: _fetch_price(symbol, symbol), ttl=ttl)
+
+    store = _get_store()
+    if store is not None and is_known_period(CANDLE_BASE_PERIOD):
+        _cached_candles(store, symbol, CANDLE_BASE_PERIOD, "1d", background=False)
+
 
-def get_stock_candles(symbol: str, period="6mo") -> pd.DataFrame:
-    """Return OHLCV candles."""
+def sync_candle_store(symbol: str, period="max", interval: str = "1d") -> Optional[Dict[str, Any]]:
+    """
+    Bring the stored series up to date for `period` from its metadata alone:
+    a missing or too short window is downloaded, a stale one topped up. The
+    stored bars are never decoded or kept in memory, so readers that stream
+    the store (CandleStore.iter_chunks) stay at constant memory. Returns the
+    store metadata (None when nothing is stored).
+    """
+    store = _get_store()
+    if store is None or not is_known_period(period):
+        return None
+    meta = store.meta(symbol, interval)
     try:
-        ticker = yf.Ticker(symbol)
-        df = ticker.history(period=period)
-        if df.empty:
-            return pd.DataFrame()
-
-        df = df.reset_index()
-        df.rename(columns={
-            "Date": "time",
-            "Open": "open",
-            "High": "high",
-            "Low": "low",
-            "Close": "close",
-            "Volume": "volume"
-        }, inplace=True)
-        return df
+        if not meta or not _covers(meta, period):
+            _download(store, symbol, period, interval)
+        elif not _is_fresh(meta, period, symbol) and meta.get("last_ts") is not None:
+            last = pd.Timestamp(int(meta["last_ts"]), unit="ns", tz="UTC")
+            last = last.tz_convert(meta["tz"]) if meta.get("tz") else last.tz_localize(None)
+            _append_since(store, symbol, interval, last)
     except Exception:
+        pass  # upstream hiccup: whatever is stored is still served
+    return store.meta(symbol, interval)
+
+
+def get_stock_candles(symbol: str, period="6mo", interval: str = "1d") -> pd.DataFrame:
+    """Return OHLCV candles (served from the local candle store when possible)."""
+    candles = get_stock_candle_arrays(symbol, period=period, interval=interval)
+    if not len(candles):
+        return pd.DataFrame()
+    return candles.to_frame()
+
+
+def get_stock_candles_many(
+    symbols: Iterable[str],
+    period="6mo",
+    interval: str = "1d",
+    as_panel: bool = False,
+    max_workers: Optional[int] = None,
+    as_arrays: bool = False,
+) -> Union[Dict[str, pd.DataFrame], Dict[str, Candles], pd.DataFrame]:
+    """
+    Candles for many symbols at once.
+
+    Symbols the candle store can answer are read from disk directly; only the
+    rest go upstream, through a bounded thread pool. Returns {SYMBOL: frame}
+    (empty frame on failure), {SYMBOL: Candles} with as_arrays=True, or, with
+    as_panel=True, one frame indexed by time with (symbol, field) columns.
+    """
+    wanted = list(dict.fromkeys(s.upper() for s in symbols))
+    out: Dict[str, Candles] = {}
+    remote = []
+    store = _get_store()
+
+    for sym in wanted:
+        if store is not None and is_known_period(period) and _is_fresh(store.meta(sym, interval), period, sym):
+            stored = _load_series(store, sym, interval)
+            if stored is not None and len(stored):
+                out[sym] = _slice_period(stored, period)
+                continue
+        remote.append(sym)
+
+    if remote:
+        workers = max(1, min(max_workers or CANDLE_FETCH_WORKERS, len(remote)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fetched = pool.map(lambda s: get_stock_candle_arrays(s, period=period, interval=interval), remote)
+            for sym, candles in zip(remote, fetched):
+                out[sym] = candles
+
+    out = {sym: out[sym] for sym in wanted}
+    if as_arrays:
+        return out
+    if not as_panel:
+        return {sym: c.to_frame() if len(c) else pd.DataFrame() for sym, c in out.items()}
+
+    frames = {sym: c.to_frame().set_index("time")[COLUMNS] for sym, c in out.items() if len(c)}
+    if not frames:
         return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index()
 
-__all__ = ["get_stock_price", "get_crypto_price", "get_stock_candles"]
+__all__ = [
+    "get_stock_price",
+    "get_crypto_price",
+    "get_stock_candles",
+    "get_stock_candle_arrays",
+    "load_candle_arrays",
+    "get_stock_candles_many",
+    "warm_symbol",
+    "sync_candle_store",
+    "candle_store",
+    "cache_stats",
+]
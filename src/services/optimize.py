@@ -0,0 +1,374 @@
+# src/services/optimize.py
+"""
+Parameter search for the backtest strategies (ma_crossover, rsi).
+
+backtest_grid() loads the candles once, precomputes what every grid point
+needs (all SMA windows from one prefix sum, the RSI series) and hands those
+read-only arrays to a process pool once per worker — not once per task.
+Points are evaluated as panels: one (bars × points) signal / position
+matrix, a simulation per column, then metrics.performance() over all
+equity curves at once. Results come back ranked by final balance.
+
+walk_forward() reuses the same precomputed arrays for rolling train/test
+folds: each fold picks the best point on its train window and reports how
+that point did on the following, unseen test window. Folds run in parallel.
+"""
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.backtesting.engine import INITIAL_CASH, point_events
+from src.backtesting.metrics import periods_per_year, performance
+from src.backtesting.simulator import Account, positions
+from src.config import BACKTEST_WORKERS
+from src.services.backtest_cache import cached_backtest
+from src.services.indicator_panel import sma_sweep
+from src.services.indicators import rsi_array
+from src.services.market_data import get_stock_candle_arrays
+
+DEFAULT_GRIDS: Dict[str, Dict[str, List[int]]] = {
+    "ma_crossover": {"short": list(range(5, 101, 5)), "long": list(range(20, 401, 20))},
+    "rsi": {"oversold": list(range(10, 50, 5)), "overbought": list(range(55, 95, 5))},
+}
+
+# below this many points a pool costs more than it saves
+_MIN_PARALLEL_POINTS = 64
+
+# cells (bars × points) per evaluation panel
+_PANEL_CELLS = 2_000_000
+
+# in-process runs report progress this many times
+_PROGRESS_STEPS = 10
+
+# performance() metrics added to every grid row
+_ROW_METRICS = ("sharpe", "sortino", "cagr_pct", "volatility_pct", "exposure_pct", "hit_rate_pct")
+_RANKABLE = ("final_balance", "return_pct", "max_drawdown_pct") + _ROW_METRICS
+
+
+# -------------------------------------------------------
+# Grid points
+# -------------------------------------------------------
+
+def _valid(stype: str, params: Dict[str, Any]) -> bool:
+    if stype == "ma_crossover":
+        return params["short"] < params["long"]
+    if stype == "rsi":
+        return params["oversold"] < params["overbought"]
+    return True
+
+
+def grid_points(stype: str, grid: Optional[Dict[str, Iterable]] = None) -> List[Dict[str, Any]]:
+    """Cartesian product of `grid` (default grid for the type), minus useless combinations."""
+    grid = grid or DEFAULT_GRIDS.get(stype)
+    if not grid:
+        raise ValueError(f"No parameter grid for strategy type {stype!r}")
+    keys = list(grid)
+    points = (dict(zip(keys, combo)) for combo in itertools.product(*(list(grid[k]) for k in keys)))
+    return [p for p in points if _valid(stype, p)]
+
+
+# -------------------------------------------------------
+# Shared inputs + evaluation
+# -------------------------------------------------------
+
+def prepare_inputs(symbol: str, candles, stype: str, points: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Arrays every point of a grid needs, computed once."""
+    close = np.ascontiguousarray(candles.close, dtype=np.float64)
+    shared: Dict[str, Any] = {"close": close, "sma": None, "rsi": None,
+                              "periods": periods_per_year(candles.time)}
+    if stype == "ma_crossover":
+        windows = sorted({p["short"] for p in points} | {p["long"] for p in points})
+        matrix = sma_sweep(close, windows)
+        shared["sma"] = {w: matrix[i] for i, w in enumerate(windows)}
+    elif stype == "rsi":
+        periods = {int(p.get("period", 14)) for p in points}
+        shared["rsi"] = {n: rsi_array(symbol, candles, n) for n in periods}
+    for arr in [close] + list((shared["sma"] or {}).values()):
+        arr.setflags(write=False)
+    return shared
+
+
+def _num(value: float, digits: int = 4) -> Optional[float]:
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def evaluate_points(shared: Dict[str, Any], stype: str, points: List[Dict[str, Any]],
+                    start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Grid points on bars [start, stop) of the shared arrays, a panel at a time."""
+    window = slice(start, stop)
+    close = shared["close"][window]
+    sma = {w: v[window] for w, v in shared["sma"].items()} if shared["sma"] else None
+    rsi = {n: v[window] for n, v in shared["rsi"].items()} if shared["rsi"] else None
+    size = max(1, _PANEL_CELLS // max(1, len(close)))
+
+    rows = []
+    for i in range(0, len(points), size):
+        chunk = points[i:i + size]
+        pos = positions(point_events(stype, chunk, close, sma=sma, rsi=rsi))
+
+        # exact all-in / all-out arithmetic per column, like backtest()
+        equity = np.empty(pos.shape, order="F")
+        accounts = []
+        for j in range(len(chunk)):
+            account = Account(INITIAL_CASH)
+            equity[:, j] = account.step(close, pos[:, j])["equity"]
+            accounts.append(account)
+
+        perf = performance(equity, pos, INITIAL_CASH, shared["periods"])
+        for j, (params, account) in enumerate(zip(chunk, accounts)):
+            balance = account.balance
+            rows.append({
+                "params": params,
+                "final_balance": round(balance, 2),
+                "profit": round(balance - INITIAL_CASH, 2),
+                "return_pct": round((balance / INITIAL_CASH - 1.0) * 100, 4),
+                "trades": account.entries + account.exits,
+                "max_drawdown_pct": round(account.max_drawdown * 100, 4),
+                **{m: _num(perf[m][j]) for m in _ROW_METRICS},
+            })
+    return rows
+
+
+def evaluate(shared: Dict[str, Any], stype: str, params: Dict[str, Any],
+             start: int = 0, stop: Optional[int] = None) -> Dict[str, Any]:
+    """One grid point on bars [start, stop) of the shared arrays."""
+    return evaluate_points(shared, stype, [params], start, stop)[0]
+
+
+# worker-process state, set once per worker by the pool initializer
+_shared: Dict[str, Any] = {}
+
+
+def _init_worker(shared: Dict[str, Any]) -> None:
+    _shared.clear()
+    _shared.update(shared)
+
+
+def _evaluate_chunk(stype: str, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return evaluate_points(_shared, stype, chunk)
+
+
+def _workers(max_workers: Optional[int]) -> int:
+    return max(1, max_workers or BACKTEST_WORKERS or os.cpu_count() or 1)
+
+
+def _collect(chunks: Iterable[List[Dict[str, Any]]], total: int,
+             progress: Optional[Callable] = None, partial: Optional[Callable] = None,
+             pool: Optional[ProcessPoolExecutor] = None) -> List[Dict[str, Any]]:
+    """
+    Flatten chunk results in order, calling progress(fraction, partial(rows))
+    after each chunk. If progress raises (e.g. the job was cancelled), queued
+    pool tasks are dropped before the error propagates.
+    """
+    rows: List[Dict[str, Any]] = []
+    try:
+        for chunk in chunks:
+            rows.extend(chunk)
+            if progress is not None:
+                progress(len(rows) / total, partial(rows) if partial else None)
+    except BaseException:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    return rows
+
+
+def _grid_partial(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"evaluated": len(rows), "best": max(rows, key=lambda r: r["final_balance"])}
+
+
+def run_points(shared: Dict[str, Any], stype: str, points: List[Dict[str, Any]],
+               max_workers: Optional[int] = None, progress: Optional[Callable] = None) -> List[Dict[str, Any]]:
+    """
+    Evaluate `points` over the whole series, in a process pool when it pays off.
+    progress: optional callback(fraction, partial) after each chunk of points.
+    """
+    workers = min(_workers(max_workers), len(points))
+    if workers <= 1 or len(points) < _MIN_PARALLEL_POINTS:
+        if progress is None:
+            return evaluate_points(shared, stype, points)
+        size = max(1, -(-len(points) // _PROGRESS_STEPS))
+        chunks = (evaluate_points(shared, stype, points[i:i + size]) for i in range(0, len(points), size))
+        return _collect(chunks, len(points), progress, _grid_partial)
+
+    # a few chunks per worker keeps them busy without per-point IPC
+    size = max(1, len(points) // (workers * 4))
+    chunks = [points[i:i + size] for i in range(0, len(points), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as pool:
+        results = pool.map(_evaluate_chunk, [stype] * len(chunks), chunks)
+        return _collect(results, len(points), progress, _grid_partial, pool)
+
+
+def _run_fold(stype: str, points: List[Dict[str, Any]], fold: Dict[str, int],
+              metric: str, shared: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    shared = _shared if shared is None else shared
+    train = evaluate_points(shared, stype, points, fold["train_start"], fold["test_start"])
+    best = max(train, key=lambda r: -np.inf if r[metric] is None else r[metric])
+    test = evaluate(shared, stype, best["params"], fold["test_start"], fold["test_stop"])
+    return {
+        **fold,
+        "params": best["params"],
+        "in_sample": {k: v for k, v in best.items() if k != "params"},
+        "out_of_sample": {k: v for k, v in test.items() if k != "params"},
+    }
+
+
+def _folds(n: int, train_bars: int, test_bars: int, step: int) -> List[Dict[str, int]]:
+    folds = []
+    start = 0
+    while start + train_bars + test_bars <= n:
+        folds.append({
+            "train_start": start,
+            "test_start": start + train_bars,
+            "test_stop": start + train_bars + test_bars,
+        })
+        start += step
+    return folds
+
+
+# -------------------------------------------------------
+# Public API
+# -------------------------------------------------------
+
+def backtest_grid(
+    symbol: str = "AAPL",
+    strategy_type: str = "ma_crossover",
+    grid: Optional[Dict[str, Iterable]] = None,
+    period: str = "1y",
+    top: Optional[int] = 20,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Backtest every point of a parameter grid and rank by final balance.
+
+    grid: {"short": [...], "long": [...]} or {"oversold": [...], "overbought": [...]};
+    None uses DEFAULT_GRIDS. top: rows returned (None = all).
+    progress: optional callback(fraction, {"evaluated", "best"}) while running.
+    """
+    started = time.perf_counter()
+    candles = get_stock_candle_arrays(symbol, period=period)
+    if not len(candles):
+        return {"error": "No candle data"}
+
+    def run():
+        points = grid_points(strategy_type, grid)
+        shared = prepare_inputs(symbol, candles, strategy_type, points)
+        rows = run_points(shared, strategy_type, points, max_workers, progress)
+        rows.sort(key=lambda r: r["final_balance"], reverse=True)
+
+        return {
+            "symbol": symbol.upper(),
+            "strategy": strategy_type,
+            "period": period,
+            "bars": len(candles),
+            "evaluated": len(rows),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "results": rows[:top] if top else rows,
+        }
+
+    spec = {"type": strategy_type, "grid": grid, "period": period, "top": top}
+    return cached_backtest("grid", symbol, candles, spec, run, coalesce=progress is None)
+
+
+def walk_forward(
+    symbol: str = "AAPL",
+    strategy_type: str = "ma_crossover",
+    grid: Optional[Dict[str, Iterable]] = None,
+    period: str = "max",
+    train_bars: int = 504,
+    test_bars: int = 126,
+    step: Optional[int] = None,
+    metric: str = "final_balance",
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Rolling walk-forward optimization.
+
+    Each fold optimizes `metric` (final_balance, return_pct, sharpe,
+    sortino, cagr_pct, ...) over the grid on `train_bars` bars, then trades
+    the winner on the next `test_bars` bars. Windows advance by `step`
+    (default: test_bars, i.e. back-to-back test windows). Indicators
+    are computed once on the full series, so test windows start with warm
+    moving averages and never see later bars.
+
+    progress: optional callback(fraction, {"folds": finished folds}) per fold.
+    """
+    started = time.perf_counter()
+    candles = get_stock_candle_arrays(symbol, period=period)
+    if not len(candles):
+        return {"error": "No candle data"}
+
+    def run():
+        folds = _folds(len(candles), int(train_bars), int(test_bars), int(step or test_bars))
+        if not folds:
+            return {"error": f"Need at least {train_bars + test_bars} bars, have {len(candles)}"}
+
+        if metric not in _RANKABLE:
+            return {"error": f"Unknown metric {metric!r}; use one of {', '.join(_RANKABLE)}"}
+        points = grid_points(strategy_type, grid)
+        shared = prepare_inputs(symbol, candles, strategy_type, points)
+
+        def partial(done):
+            return {"folds": done}
+
+        workers = min(_workers(max_workers), len(folds))
+        if workers <= 1:
+            runs = ([_run_fold(strategy_type, points, f, metric, shared)] for f in folds)
+            rows = _collect(runs, len(folds), progress, partial)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as pool:
+                n = len(folds)
+                runs = pool.map(_run_fold, [strategy_type] * n, [points] * n, folds, [metric] * n)
+                rows = _collect(([r] for r in runs), n, progress, partial, pool)
+
+        def stamp(i):
+            return candles[i:i + 1].last_time().isoformat()
+
+        growth = 1.0
+        for k, row in enumerate(rows):
+            row["fold"] = k
+            row["train_from"] = stamp(row["train_start"])
+            row["test_from"] = stamp(row["test_start"])
+            row["test_to"] = stamp(row["test_stop"] - 1)
+            growth *= 1.0 + row["out_of_sample"]["return_pct"] / 100
+
+        oos = [r["out_of_sample"]["return_pct"] for r in rows]
+        return {
+            "symbol": symbol.upper(),
+            "strategy": strategy_type,
+            "mode": "walk_forward",
+            "bars": len(candles),
+            "train_bars": int(train_bars),
+            "test_bars": int(test_bars),
+            "grid_points": len(points),
+            "folds": rows,
+            "out_of_sample": {
+                "compounded_return_pct": round((growth - 1.0) * 100, 4),
+                "mean_return_pct": round(float(np.mean(oos)), 4),
+                "positive_folds": int(sum(r > 0 for r in oos)),
+            },
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    spec = {"type": strategy_type, "grid": grid, "period": period, "train_bars": train_bars,
+            "test_bars": test_bars, "step": step, "metric": metric}
+    return cached_backtest("walk_forward", symbol, candles, spec, run, coalesce=progress is None)
+
+
+__all__ = [
+    "DEFAULT_GRIDS",
+    "grid_points",
+    "prepare_inputs",
+    "evaluate_points",
+    "evaluate",
+    "run_points",
+    "backtest_grid",
+    "walk_forward",
+]
@@ -0,0 +1,178 @@
+# src/services/portfolio.py
+"""
+Multi-symbol portfolio backtest with periodic rebalancing.
+
+Every symbol of the basket gets a sleeve of the capital (equal weights by
+default). A sleeve follows the strategy on its own symbol exactly like
+backtest() does — invested at the close of an entry bar, back in cash at
+the close of an exit bar — and at every rebalance date the total equity is
+split across the sleeves by weight again.
+
+All symbols are simulated at once on aligned (bars × symbols) arrays: panel
+indicators → panel positions → per-bar sleeve growth → one cumulative
+product, re-based at each rebalance.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.backtesting.engine import DEFAULT_STRATEGY, INITIAL_CASH, signal_events
+from src.backtesting.metrics import performance, periods_per_year
+from src.backtesting.simulator import positions
+from src.services.indicator_panel import align_close, panel_rsi, panel_sma
+from src.services.market_data import get_stock_candle_arrays, get_stock_candles_many
+
+REBALANCE_FREQS = {"weekly": "W", "monthly": "M", "quarterly": "Q", "yearly": "Y"}
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """Carry the last non-NaN value forward along axis 0."""
+    bars = np.arange(len(values))[:, None]
+    idx = np.maximum.accumulate(np.where(np.isnan(values), -1, bars), axis=0)
+    out = np.take_along_axis(values, np.maximum(idx, 0), axis=0)
+    out[idx < 0] = np.nan
+    return out
+
+
+def rebalance_points(times: np.ndarray, tz: Optional[str], rebalance: Union[str, int, None]) -> np.ndarray:
+    """Boolean per bar: True where a new rebalance period starts (bar 0 excluded)."""
+    flags = np.zeros(len(times), dtype=bool)
+    if rebalance in (None, "none", 0) or len(times) < 2:
+        return flags
+    if isinstance(rebalance, int):
+        flags[rebalance::rebalance] = True
+        return flags
+    freq = REBALANCE_FREQS.get(str(rebalance).lower())
+    if freq is None:
+        raise ValueError(f"Unknown rebalance frequency: {rebalance!r}")
+    stamps = pd.to_datetime(times, unit="ns", utc=True)
+    if tz:
+        stamps = stamps.tz_convert(tz)
+    periods = stamps.tz_localize(None).to_period(freq).asi8
+    flags[1:] = periods[1:] != periods[:-1]
+    return flags
+
+
+def _panel_inputs(close: np.ndarray, stype: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    if stype == "ma_crossover":
+        windows = {params["short"], params["long"]}
+        # full-window means, like close.rolling(w).mean() in backtest()
+        return {"sma": {w: panel_sma(close, w, min_periods=w) for w in windows}}
+    if stype == "rsi":
+        return {"rsi": panel_rsi(close, int(params.get("period", 14)))}
+    return {}
+
+
+def backtest_portfolio(
+    symbols: Iterable[str],
+    strategy: Optional[Dict[str, Any]] = None,
+    period: str = "1y",
+    rebalance: Union[str, int, None] = "monthly",
+    weights: Optional[Dict[str, float]] = None,
+    initial_cash: float = INITIAL_CASH,
+    progress: Optional[Callable] = None,
+) -> Dict[str, Any]:
+    """
+    Run `strategy` across a basket and return the combined equity curve.
+
+    rebalance: "weekly" | "monthly" | "quarterly" | "yearly", every N bars
+    (int), or None for buy-and-let-drift. weights: {SYMBOL: weight},
+    normalized (keys are case-insensitive and must name basket symbols);
+    equal weights when omitted. progress: optional
+    callback(fraction, {"loaded", "symbols"}); the basket is then loaded one
+    symbol at a time, so a job can report (and be cancelled) between them.
+    """
+    started = time.perf_counter()
+    strategy = strategy or DEFAULT_STRATEGY
+    stype, params = strategy["type"], strategy.get("params", {})
+
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    if weights:
+        weights = {str(k).upper(): v for k, v in weights.items()}
+        unknown = sorted(set(weights) - set(symbols))
+        if unknown:
+            return {"error": f"Weights for symbols not in the portfolio: {', '.join(unknown)}"}
+
+    if progress is None:
+        candles = get_stock_candles_many(symbols, period=period, as_arrays=True)
+    else:
+        candles = {}
+        for k, sym in enumerate(symbols):
+            candles[sym] = get_stock_candle_arrays(sym, period=period)
+            progress((k + 1) / (len(symbols) + 1), {"loaded": k + 1, "symbols": len(symbols)})
+    times, syms, close = align_close(candles)
+    if not syms:
+        return {"error": "No candle data"}
+    tz = next(c.tz for c in candles.values() if len(c))
+
+    w = np.array([float((weights or {}).get(s, 0.0 if weights else 1.0)) for s in syms])
+    if w.sum() <= 0:
+        return {"error": "Weights must be positive for at least one symbol"}
+    w = w / w.sum()
+
+    # positions for every symbol in one pass
+    events = signal_events(stype, params, close, **_panel_inputs(close, stype, params))
+    pos = positions(events)
+
+    # sleeve growth per bar: the bar's return while the previous bar was long
+    px = _ffill(close)
+    growth = np.ones_like(px)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        growth[1:] = np.where(pos[:-1] == 1, px[1:] / px[:-1], 1.0)
+    growth[~np.isfinite(growth)] = 1.0
+
+    # cumulative sleeve value, re-based at each rebalance
+    cum = np.cumprod(growth, axis=0)
+    flags = rebalance_points(times, tz, rebalance)
+    segment = np.cumsum(flags)
+    starts = np.concatenate([[0], np.flatnonzero(flags)])
+    base = np.ones((len(starts), len(syms)))
+    base[1:] = cum[starts[1:] - 1]
+    sleeve = cum / base[segment]                 # growth since the segment start
+    seg_growth = (sleeve * w).sum(axis=1)        # portfolio growth since the segment start
+
+    # equity at each segment start, then the curve
+    ends = np.concatenate([starts[1:] - 1, [len(times) - 1]])
+    seg_start_equity = initial_cash * np.concatenate([[1.0], np.cumprod(seg_growth[ends])[:-1]])
+    equity = seg_start_equity[segment] * seg_growth
+
+    final = float(equity[-1])
+    peak = np.maximum.accumulate(equity)
+    drawdown = float((equity / peak - 1.0).min()) * 100
+    trades = np.abs(np.diff(pos, axis=0, prepend=np.int8(0))).sum(axis=0)
+    stamps = pd.to_datetime(times, unit="ns", utc=True)
+    if tz:
+        stamps = stamps.tz_convert(tz)
+
+    return {
+        "symbols": syms,
+        "strategy": strategy,
+        "period": period,
+        "rebalance": rebalance,
+        "bars": len(times),
+        "rebalances": int(flags.sum()),
+        "final_balance": round(final, 2),
+        "profit": round(final - initial_cash, 2),
+        "return_pct": round((final / initial_cash - 1.0) * 100, 4),
+        "max_drawdown_pct": round(drawdown, 4),
+        "metrics": performance(equity, initial_cash=initial_cash, periods=periods_per_year(times)),
+        "per_symbol": {
+            s: {
+                "weight": round(float(w[j]), 6),
+                "trades": int(trades[j]),
+                "exposure_pct": round(float(pos[:, j].mean()) * 100, 2),
+            }
+            for j, s in enumerate(syms)
+        },
+        "equity_curve": {
+            "time": [t.isoformat() for t in stamps],
+            "equity": [round(float(v), 2) for v in equity],
+        },
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+__all__ = ["backtest_portfolio", "rebalance_points"]
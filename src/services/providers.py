@@ -0,0 +1,304 @@
+# src/services/providers.py
+"""
+Market-data providers.
+
+market_data.py talks to upstream only through a MarketDataProvider:
+
+- YFinanceProvider: live data from Yahoo Finance (default)
+- ReplayProvider:   recorded CSVs or deterministic synthetic OHLCV served
+                    from local files at a fixed latency — no network needed,
+                    so load tests and benchmarks are reproducible
+
+Pick one with STOCKER_MARKET_PROVIDER=yfinance|replay, or swap at runtime
+with set_provider().
+"""
+
+import os
+import time
+import zlib
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    MARKET_PROVIDER, REPLAY_DIR, REPLAY_LATENCY_MS, REPLAY_SYNTHETIC,
+)
+
+try:
+    import yfinance as yf
+except ImportError:
+    yf = None   # only needed by YFinanceProvider
+
+
+# -------------------------------------------------------
+# Period helpers (yfinance period strings)
+# -------------------------------------------------------
+
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def is_known_period(period: str) -> bool:
+    return period in PERIOD_OFFSETS or period in ("ytd", "max")
+
+
+def period_start(period: str, now: pd.Timestamp) -> Optional[pd.Timestamp]:
+    """Start of the window a yfinance `period` covers (None = unbounded)."""
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    return now.normalize() - PERIOD_OFFSETS[period]
+
+
+def normalize_history(df: pd.DataFrame) -> pd.DataFrame:
+    """yfinance history frame → time/open/high/low/close/volume columns."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+
+    df = df.reset_index()
+    df.rename(columns={
+        "Date": "time",
+        "Datetime": "time",
+        "Open": "open",
+        "High": "high",
+        "Low": "low",
+        "Close": "close",
+        "Volume": "volume"
+    }, inplace=True)
+    return df
+
+
+# -------------------------------------------------------
+# Interface
+# -------------------------------------------------------
+
+class MarketDataProvider:
+    """Source of raw OHLCV bars. Implementations must be thread-safe."""
+
+    name = "base"
+
+    def history(
+        self,
+        symbol: str,
+        period: Optional[str] = None,
+        start: Optional[pd.Timestamp] = None,
+        interval: str = "1d",
+    ) -> pd.DataFrame:
+        """
+        Bars for `symbol` with columns time/open/high/low/close/volume.
+
+        Either `period` (yfinance period string) or `start` is given.
+        Returns an empty frame when the symbol has no data.
+        """
+        raise NotImplementedError
+
+    def latest_price(self, symbol: str) -> Optional[float]:
+        """Last traded price, or None when there is no data."""
+        df = self.history(symbol, period="1d")
+        if df.empty:
+            return None
+        return float(df["close"].iloc[-1])
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def __init__(self):
+        if yf is None:
+            raise RuntimeError("yfinance is not installed")
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            df = ticker.history(start=start.strftime("%Y-%m-%d"), interval=interval)
+        else:
+            df = ticker.history(period=period, interval=interval)
+        return normalize_history(df)
+
+
+# -------------------------------------------------------
+# Offline replay
+# -------------------------------------------------------
+
+_REPLAY_FREQ = {"1d": "B", "1h": "h", "30m": "30min", "15m": "15min", "5m": "5min", "1m": "min"}
+
+
+def synthetic_ohlcv(
+    symbol: str,
+    bars: int,
+    interval: str = "1d",
+    end: Optional[pd.Timestamp] = None,
+    tz: Optional[str] = "America/New_York",
+) -> pd.DataFrame:
+    """
+    Deterministic geometric-random-walk OHLCV for `symbol`.
+
+    The same symbol always yields the same prices (seeded from its name), so
+    runs are comparable across machines.
+    """
+    rng = np.random.default_rng(zlib.crc32(symbol.upper().encode()))
+    freq = _REPLAY_FREQ.get(interval, "B")
+    if end is None:
+        end = pd.Timestamp.now(tz=tz).normalize()
+    times = pd.date_range(end=end, periods=bars, freq=freq)
+
+    start_price = 20.0 + rng.random() * 480.0
+    rets = rng.normal(0.0003, 0.02, size=bars)
+    close = start_price * np.exp(np.cumsum(rets))
+    open_ = np.empty_like(close)
+    open_[0] = start_price
+    open_[1:] = close[:-1]
+    spread = np.abs(rng.normal(0, 0.01, size=bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.integers(100_000, 10_000_000, size=bars).astype(float)
+
+    return pd.DataFrame({
+        "time": times,
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    })
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Serves bars from local files at a fixed, configurable latency.
+
+    Files are looked up as <root>/<interval>/<SYMBOL>.csv, then
+    <root>/<SYMBOL>.csv (columns: time, open, high, low, close, volume).
+    Symbols without a file get synthetic_ohlcv() bars when `synthetic` is on,
+    otherwise an empty frame (which callers treat as an unknown symbol).
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        latency_ms: float = 0.0,
+        synthetic: bool = True,
+        synthetic_bars: int = 2520,
+    ):
+        self.root = root
+        self.latency_ms = latency_ms
+        self.synthetic = synthetic
+        self.synthetic_bars = synthetic_bars
+        self._series: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._lock = Lock()
+
+    def _read_file(self, symbol: str, interval: str) -> Optional[pd.DataFrame]:
+        if not self.root:
+            return None
+        for path in (
+            os.path.join(self.root, interval, f"{symbol}.csv"),
+            os.path.join(self.root, f"{symbol}.csv"),
+        ):
+            if os.path.exists(path):
+                df = pd.read_csv(path)
+                df["time"] = pd.to_datetime(df["time"], utc=True).dt.tz_convert("America/New_York")
+                return df.sort_values("time").reset_index(drop=True)
+        return None
+
+    def _full_series(self, symbol: str, interval: str) -> pd.DataFrame:
+        key = (symbol.upper(), interval)
+        with self._lock:
+            df = self._series.get(key)
+        if df is not None:
+            return df
+
+        df = self._read_file(symbol.upper(), interval)
+        if df is None:
+            df = synthetic_ohlcv(symbol, self.synthetic_bars, interval) if self.synthetic else pd.DataFrame()
+
+        with self._lock:
+            self._series[key] = df
+        return df
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+        df = self._full_series(symbol, interval)
+        if df.empty:
+            return pd.DataFrame()
+
+        tz = getattr(df["time"].dt, "tz", None)
+        if start is not None:
+            cutoff = pd.Timestamp(start)
+            if tz is not None and cutoff.tzinfo is None:
+                cutoff = cutoff.tz_localize(tz)
+        elif period and is_known_period(period):
+            cutoff = period_start(period, pd.Timestamp.now(tz=tz))
+        else:
+            cutoff = None
+
+        if cutoff is not None:
+            df = df.loc[df["time"] >= cutoff]
+        return df.reset_index(drop=True).copy()
+
+    def latest_price(self, symbol):
+        # like yfinance's period="1d": the last session's close, even on weekends
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        df = self._full_series(symbol, "1d")
+        if df.empty:
+            return None
+        return float(df["close"].iloc[-1])
+
+
+# -------------------------------------------------------
+# Active provider
+# -------------------------------------------------------
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = Lock()
+
+
+def _build_default() -> MarketDataProvider:
+    if MARKET_PROVIDER == "replay":
+        return ReplayProvider(REPLAY_DIR, latency_ms=REPLAY_LATENCY_MS, synthetic=REPLAY_SYNTHETIC)
+    return YFinanceProvider()
+
+
+def get_provider() -> MarketDataProvider:
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = _build_default()
+        return _provider
+
+
+def set_provider(provider: MarketDataProvider) -> None:
+    """Swap the active provider (benchmarks, tests, offline demos)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+__all__ = [
+    "MarketDataProvider",
+    "YFinanceProvider",
+    "ReplayProvider",
+    "synthetic_ohlcv",
+    "get_provider",
+    "set_provider",
+    "PERIOD_OFFSETS",
+    "is_known_period",
+    "period_start",
+    "normalize_history",
+]
@@ -0,0 +1,113 @@
+# src/services/symbol_resolver.py
+"""
+Symbol → asset class / provider ticker resolution (e.g. BTC → crypto, BTC-USD).
+
+The first lookup probes upstream (equity first, then the SYMBOL-USD crypto
+fallback). The answer is kept in memory and persisted in the `symbols` table,
+so later requests go straight to the right ticker. Unknown symbols are cached
+too, for UNKNOWN_SYMBOL_TTL_SEC, so typos do not hit upstream every time — but
+only when upstream really returned no data; a probe that failed is retried on
+the next call.
+"""
+
+import time
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from src.config import UNKNOWN_SYMBOL_TTL_SEC
+from src.database.symbols import get_symbol, save_symbol, delete_symbol
+from src.services.market_calendar import is_crypto
+from src.services.market_data import load_candle_arrays
+
+_memo: Dict[str, Dict[str, Any]] = {}
+_lock = Lock()
+
+
+def _expired(entry: Dict[str, Any]) -> bool:
+    return (
+        entry["asset_class"] == "unknown"
+        and time.time() - (entry.get("resolved_at") or 0) > UNKNOWN_SYMBOL_TTL_SEC
+    )
+
+
+def _has_data(ticker: str) -> bool:
+    # goes through the candle store, so the probe's bars are reused afterwards;
+    # upstream errors propagate (an empty result means "no such ticker")
+    return len(load_candle_arrays(ticker, period="6mo")) > 0
+
+
+def _probe(symbol: str) -> Dict[str, Any]:
+    """Resolve via upstream; raises if a candidate could not be checked and none had data."""
+    if is_crypto(symbol):
+        candidates = [("crypto", symbol)]
+    else:
+        candidates = [("equity", symbol), ("crypto", symbol + "-USD")]
+
+    failure: Optional[Exception] = None
+    for asset_class, ticker in candidates:
+        try:
+            if _has_data(ticker):
+                return {"symbol": symbol, "asset_class": asset_class, "ticker": ticker}
+        except Exception as e:
+            failure = e
+    if failure is not None:
+        raise failure
+    return {"symbol": symbol, "asset_class": "unknown", "ticker": None}
+
+
+def _lookup(symbol: str) -> Optional[Dict[str, Any]]:
+    with _lock:
+        entry = _memo.get(symbol)
+    if entry is None:
+        try:
+            entry = get_symbol(symbol)
+        except Exception:
+            entry = None
+    if entry is None or _expired(entry):
+        return None
+    with _lock:
+        _memo[symbol] = entry
+    return entry
+
+
+def resolve_symbol(symbol: str) -> Dict[str, Any]:
+    """
+    Return {"symbol", "asset_class": equity|crypto|unknown, "ticker"}.
+
+    `ticker` is what to pass to market_data (None for unknown symbols).
+    """
+    symbol = (symbol or "").strip().upper()
+    if not symbol:
+        return {"symbol": symbol, "asset_class": "unknown", "ticker": None}
+
+    entry = _lookup(symbol)
+    if entry is not None:
+        return dict(entry)
+
+    try:
+        entry = _probe(symbol)
+    except Exception as e:
+        # upstream failed: answer "unknown" for now, but remember nothing
+        return {"symbol": symbol, "asset_class": "unknown", "ticker": None, "error": str(e)}
+    entry["resolved_at"] = time.time()
+    with _lock:
+        _memo[symbol] = entry
+    try:
+        save_symbol(symbol, entry["asset_class"], entry["ticker"], entry["resolved_at"])
+    except Exception:
+        pass  # the in-memory answer still saves the round trips for this process
+    return dict(entry)
+
+
+def forget_symbol(symbol: str) -> None:
+    """Drop a cached resolution (e.g. after a listing change)."""
+    symbol = symbol.strip().upper()
+    with _lock:
+        _memo.pop(symbol, None)
+    try:
+        delete_symbol(symbol)
+    except Exception:
+        pass
+
+
+__all__ = ["resolve_symbol", "forget_symbol"]
@@ -0,0 +1,65 @@
+# src/services/watchlist.py
+"""
+Background refresher that keeps the configured watchlist warm.
+
+Runs as an asyncio task inside the FastAPI app. Every WATCHLIST_REFRESH_SEC
+it re-fetches quotes that are about to expire and tops up stored daily bars,
+so dashboard requests for popular symbols are answered from cache instead of
+waiting on upstream. It also folds the new bars into the streaming indicator
+engine (and checkpoints it), so live_indicators for watched symbols stay O(1).
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from src.config import WATCHLIST, WATCHLIST_REFRESH_SEC
+from src.services.indicator_engine import live_indicators
+from src.services.market_data import warm_symbol
+from src.utils.logger import log_event, log_error
+
+
+class WatchlistRefresher:
+    def __init__(self, symbols: Optional[List[str]] = None, interval_sec: float = WATCHLIST_REFRESH_SEC):
+        self.symbols = [s.upper() for s in (symbols if symbols is not None else WATCHLIST)]
+        self.interval_sec = interval_sec
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, Any] = {"runs": 0, "errors": 0, "last_run_ts": None}
+
+    def refresh_once(self) -> None:
+        """Warm every symbol once (blocking; run it off the event loop)."""
+        for symbol in self.symbols:
+            try:
+                # refresh anything that would expire before the next pass
+                warm_symbol(symbol, refresh_within=self.interval_sec)
+                live_indicators(symbol)
+            except Exception as e:
+                self.stats["errors"] += 1
+                log_error(None, f"watchlist refresh failed for {symbol}", e)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.to_thread(self.refresh_once)
+            self.stats["runs"] += 1
+            self.stats["last_run_ts"] = int(time.time())
+            await asyncio.sleep(self.interval_sec)
+
+    def start(self) -> None:
+        if self._task is None and self.symbols:
+            log_event(None, "watchlist.start", details={"symbols": self.symbols, "interval_sec": self.interval_sec})
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+refresher = WatchlistRefresher()
+
+__all__ = ["WatchlistRefresher", "refresher"]
@@ -0,0 +1,211 @@
+# src/utils/cache.py
+"""
+Small in-process cache with TTL, LRU eviction and single-flight loading.
+
+- get_or_load(key, loader): return cached value or call loader() once,
+  even if many threads ask for the same key at the same time
+- stale-while-revalidate: with stale_ttl set, an expired entry is still
+  served for that long while a refresh runs on a small background pool
+- stats(): hit / miss / coalesced / stale / eviction counters for tuning
+
+Thread-safe.
+"""
+
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Flight:
+    """One in-progress load that other callers can wait on."""
+
+    def __init__(self):
+        self.done = Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    def __init__(
+        self,
+        ttl: Optional[float] = 60.0,
+        maxsize: int = 1024,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        stale_ttl: Optional[float] = None,
+    ):
+        """
+        ttl: seconds an entry stays valid (None = until evicted)
+        maxsize: max entries before least-recently-used ones are dropped
+        cache_if: predicate deciding whether a loaded value is stored
+        stale_ttl: extra seconds an expired entry may be served while it
+                   is refreshed in the background (None = never stale)
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.cache_if = cache_if
+        self.stale_ttl = stale_ttl
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._lock = Lock()
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "stale": 0, "evictions": 0}
+
+    # --------------------------------------------------
+    # Basic access
+    # --------------------------------------------------
+
+    def _expired(self, expires_at: Optional[float], now: float) -> bool:
+        return expires_at is not None and now >= expires_at
+
+    def _servable_stale(self, expires_at: Optional[float], now: float) -> bool:
+        return self.stale_ttl is not None and expires_at is not None and now < expires_at + self.stale_ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._expired(entry[1], now):
+                self._stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until `key` expires (negative once expired, None if absent)."""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is None:
+            return float("inf")
+        return entry[1] - time.time()
+
+    def values(self) -> list:
+        """Snapshot of live values (expired entries skipped)."""
+        now = time.time()
+        with self._lock:
+            return [v for v, exp in self._data.values() if not self._expired(exp, now)]
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    # --------------------------------------------------
+    # Single-flight load
+    # --------------------------------------------------
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return cached value for key, loading it at most once concurrently."""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._data.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+
+            if entry is not None and self._servable_stale(entry[1], now):
+                # serve the old value now, refresh behind the caller's back
+                self._data.move_to_end(key)
+                self._stats["stale"] += 1
+                if key not in self._inflight:
+                    flight = _Flight()
+                    self._inflight[key] = flight
+                    self._background().submit(self._run_flight, key, flight, loader, ttl, False)
+                return entry[0]
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._stats["misses"] += 1
+                leader = True
+
+        if not leader:
+            return self._wait(flight)
+        return self._run_flight(key, flight, loader, ttl, True)
+
+    def refresh(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Load `key` now regardless of expiry (joins a load already in flight)."""
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._inflight[key] = flight
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            return self._wait(flight)
+        return self._run_flight(key, flight, loader, ttl, True)
+
+    def _wait(self, flight: _Flight) -> Any:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _run_flight(self, key, flight: _Flight, loader, ttl, reraise: bool) -> Any:
+        try:
+            value = loader()
+            flight.value = value
+            if self.cache_if is None or self.cache_if(value):
+                self.set(key, value, ttl=ttl)
+            return value
+        except BaseException as e:
+            flight.error = e
+            if reraise:
+                raise
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _background(self) -> ThreadPoolExecutor:
+        # called with self._lock held
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+        return self._executor
+
+    # --------------------------------------------------
+    # Reporting
+    # --------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out = dict(self._stats)
+            out["size"] = len(self._data)
+        served = out["hits"] + out["coalesced"] + out["stale"]
+        lookups = served + out["misses"]
+        out["hit_rate"] = round(served / lookups, 4) if lookups else 0.0
+        return out
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+
+__all__ = ["TTLCache"]
@@ -1,25 +1,72 @@
 # ui/pages/backtest.py
+import time
 import streamlit as st
 from ui.services.api_client import call_backend
 
+# backtests run as backend jobs; the page polls instead of blocking on one request
+POLL_SEC = 1.0
+
+MODES = {
+    "Single run": None,
+    "Walk-forward": "walk_forward",
+    "Monte Carlo": "monte_carlo",
+    "Full history (stream)": "stream",
+}
+
+def _job_call(intent, payload):
+    resp = call_backend(message=intent.replace("_", " "), intent=intent, payload=payload)
+    return resp.get("response", {})
+
 def render():
     st.title("📉 Backtesting Engine")
 
     symbol = st.text_input("Symbol", "AAPL").upper()
+    mode = st.selectbox("Mode", list(MODES))
+    period = st.selectbox("Period", ["6mo", "1y", "5y", "max"], index=1)
 
     if st.button("Run Backtest"):
-        resp = call_backend(
-            message="run backtest",
-            intent="backtest",
-            payload={"symbol": symbol}
-        )
+        payload = {"kind": "backtest", "symbol": symbol, "period": period}
+        if MODES[mode]:
+            payload["mode"] = MODES[mode]
 
-        data = resp.get("response", {})
-
-        if "error" in data:
-            st.error(data["error"])
+        job = _job_call("backtest_submit", payload)
+        if "error" in job:
+            st.error(job["error"])
             return
+        st.session_state["backtest_job"] = job["job_id"]
+
+    job_id = st.session_state.get("backtest_job")
+    if not job_id:
+        return
+
+    job = _job_call("backtest_status", {"job_id": job_id})
+    status = job.get("status")
 
+    if status is None:
+        st.error(job.get("error", "Backtest job not found"))
+        st.session_state.pop("backtest_job", None)
+        return
+
+    if status in ("queued", "running", "cancelling"):
+        progress = float(job.get("progress") or 0.0)
+        st.progress(progress, text=f"{status.capitalize()} — {progress:.0%}")
+
+        if job.get("partial"):
+            with st.expander("Partial results"):
+                st.json(job["partial"])
+
+        if st.button("Cancel") and status != "cancelling":
+            _job_call("backtest_cancel", {"job_id": job_id})
+
+        time.sleep(POLL_SEC)
+        st.rerun()
+
+    elif status == "done":
         st.success("Backtest Completed")
+        st.json(job.get("result") or {})
+
+    elif status == "cancelled":
+        st.warning("Backtest cancelled")
 
-        st.json(data)
+    else:
+        st.error(job.get("error") or "Backtest failed")
@@ -23,10 +23,19 @@ def render():
     show_volume = st.checkbox("Show Volume", True)
 
     if st.button("Load Chart"):
+        # backend only computes the overlays that are switched on
+        overlays = []
+        if show_sma:
+            overlays += ["sma50", "sma200"]
+        if show_ema:
+            overlays.append("ema20")
+        if show_rsi:
+            overlays.append("rsi")
+
         resp = call_backend(
             message="get chart",
             intent="candles",
-            payload={"symbol": symbol, "period": period}
+            payload={"symbol": symbol, "period": period, "indicators": overlays}
         )
 
         data = resp.get("response", {})